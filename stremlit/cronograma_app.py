@@ -1,17 +1,39 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, date
 import io
-import math
-import json
 import os
-
-
-# Configurações
-DIAS_SEMANA = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado"]
-TEMPO_PADRAO = "1h Estudo"
-PROGRESS_FILE = "progresso_estudos.json"
-CONCURSO = "Polícia Rodoviaria Federal"
+import html
+import string
+import time
+import cProfile
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from cronograma_core import (
+    CONCURSO, PROGRESS_FILE, PROGRESS_DB, CONCLUSOES_FILE, CACHE_DISCO_ATIVO,
+    load_data_colunar, hash_arquivo, CacheLRU, IndiceAssuntos, VisaoCronograma, VisaoOrcamento,
+    VisaoRevisoes, INTERVALOS_REVISAO, VisaoIntercalada,
+    nome_concurso, mesclar_editais,
+    gerar_cronograma_compacto, EstatisticasProgresso, formatar_datas,
+    DiarioProgresso, ProgressoSQLite, PerfilProgresso, GravadorAssincrono, FORMATOS_EXPORT, Cronometro,
+    DatasConclusao,
+)
+
+
+INICIO_RERUN = time.perf_counter()  # o script inteiro roda de novo a cada rerun completo
+
+# Configurações da interface
+PROGRESS_BACKEND = os.environ.get("CRONOGRAMA_PROGRESSO", "json")  # "json" ou "sqlite"
+GRAVACAO_ASSINCRONA = os.environ.get("CRONOGRAMA_GRAVACAO_ASSINCRONA") == "1"
+MAX_EDITAIS_CACHE = 8  # quantidade de editais parseados mantidos em memória
+MAX_CARDS_CACHE = 512  # fragmentos HTML de cards mantidos em memória
+ADMIN = os.environ.get("CRONOGRAMA_ADMIN") == "1"  # painel de desempenho e profiler
+MAX_RERUNS_PERFIL = 20  # reruns mantidos no painel de desempenho
+PASTA_PERFIS = os.environ.get("CRONOGRAMA_PERFIS", ".")
+
+cronometro = Cronometro(ativo=ADMIN)
+st.session_state["cronometro_rerun"] = cronometro
 
 st.set_page_config(page_title=f"Cronograma de Estudos - {CONCURSO}", layout="wide")
 
@@ -51,6 +73,12 @@ st.markdown("""
     line-height: 1.2;
 }
 
+.week-grid {
+    display: grid;
+    grid-template-columns: repeat(6, minmax(0, 1fr));
+    gap: 1rem;
+}
+
 .week-title {
     font-size: 24px;
     font-weight: 700;
@@ -80,197 +108,471 @@ st.markdown("""
 
 # --- Funções ---
 
-def load_data(file, cols=None):
-    try:
-        df = pd.read_excel(file)
-        if cols:
-            df = df[cols]
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar o arquivo: {e}")
-        return None
-
-def expandir_assuntos(df, col_disciplina, col_assunto, col_carga):
-    plano = []
-    for disc, group in df.groupby(col_disciplina):
-        for _, row in group.iterrows():
-            assunto = row[col_assunto]
-            carga = row[col_carga]
-            carga_int = int(carga)
-            carga_decimal = carga - carga_int
-
-            for i in range(carga_int):
-                plano.append((disc, f"{assunto} - Parte {i+1}", "Estudo"))
-
-            if carga_decimal > 0:
-                plano.append((disc, f"{assunto} - Parte final ({carga_decimal:.1f}h)", "Estudo"))
-
-            plano.append((disc, f"Revisão {assunto}", "Revisão"))
-
-    return plano
-
-def gerar_cronograma(df, col_disciplina, col_assunto, col_carga, data_inicio):
-    plano = expandir_assuntos(df, col_disciplina, col_assunto, col_carga)
-    data_atual = data_inicio
-    linhas = []
-
-    for disc, assunto, tipo in plano:
-        while data_atual.weekday() == 6:  # pula domingos
-            data_atual += timedelta(days=1)
-
-        dia_semana = DIAS_SEMANA[data_atual.weekday()]
-
-        linhas.append({
-            "id": f"{disc}::{assunto}",
-            "Data": data_atual.strftime("%d/%m/%Y"),
-            "Dia da Semana": dia_semana,
-            "Disciplina": disc,
-            "Assunto": assunto,
-            "Tipo": tipo,
-            "Tempo": TEMPO_PADRAO
-        })
-
-        data_atual += timedelta(days=1)
-
-    return pd.DataFrame(linhas)
-
-def salvar_progresso(progresso):
-    with open(PROGRESS_FILE, "w") as f:
-        json.dump(progresso, f)
-
-def carregar_progresso():
-    if os.path.exists(PROGRESS_FILE):
-        try:
-            with open(PROGRESS_FILE, "r") as f:
-                return json.load(f)
-        except:
-            return {}
+@st.cache_resource
+def cache_editais():
+    # compartilhado entre reruns e sessões; o script é reexecutado a cada interação
+    return CacheLRU(MAX_EDITAIS_CACHE)
+
+def load_data_cache(dados, cols, hash_dados, cache):
+    # Só faz o parse do .xlsx uma vez por conteúdo distinto (hash dos bytes + colunas).
+    # Roda em threads do pool: nada de chamadas st.* aqui, erros sobem ao chamador.
+    chave = (hash_dados, tuple(cols) if cols else None)
+    df = cache.get(chave)
+    if df is None:
+        df = load_data_colunar(io.BytesIO(dados), cols, hash_dados)
+        cache.put(chave, df)
+    return df
+
+def carregar_editais(arquivos, cols):
+    # Parse concorrente: o tempo total é o do arquivo mais lento, não a soma.
+    # Devolve ({concurso: df}, {concurso: hash}, [(arquivo, erro)])
+    cache = cache_editais()
+    conteudos = []
+    for a in arquivos:
+        concurso, n = nome_concurso(a.name), 1
+        while any(concurso == c for c, _, _ in conteudos):
+            n += 1
+            concurso = f"{nome_concurso(a.name)} ({n})"
+        conteudos.append((concurso, a.name, a.getvalue()))
+    hashes = {concurso: hash_arquivo(dados) for concurso, _, dados in conteudos}
+    editais, erros = {}, []
+    with ThreadPoolExecutor(max_workers=max(len(conteudos), 1)) as pool:
+        tarefas = [
+            (concurso, nome, pool.submit(load_data_cache, dados, cols, hashes[concurso], cache))
+            for concurso, nome, dados in conteudos
+        ]
+        for concurso, nome, tarefa in tarefas:
+            try:
+                editais[concurso] = tarefa.result()
+            except Exception as e:
+                erros.append((nome, e))
+    return editais, hashes, erros
+
+@st.cache_resource
+def diario_progresso(caminho=PROGRESS_FILE):
+    return DiarioProgresso(caminho)
+
+@st.cache_resource
+def progresso_sqlite(caminho=PROGRESS_DB):
+    # Uma conexão por arquivo, compartilhada por todos os perfis e planos
+    return ProgressoSQLite(caminho)
+
+@st.cache_resource
+def datas_conclusao(caminho=CONCLUSOES_FILE):
+    return DatasConclusao(caminho)
+
+@st.cache_resource
+def gravador_assincrono(chave, _backend):
+    # Uma thread de gravação por arquivo de backend, compartilhada entre as sessões
+    return GravadorAssincrono(_backend)
+
+def backend_progresso(usuario, plano):
+    # JSON continua sendo o padrão; CRONOGRAMA_PROGRESSO=sqlite ativa o banco
+    if PROGRESS_BACKEND == "sqlite":
+        chave = ("sqlite", PROGRESS_DB)
+        backend = progresso_sqlite()
     else:
-        return {}
-
-# Inicializa progresso no session_state
-if "progresso" not in st.session_state:
-    st.session_state["progresso"] = carregar_progresso()
-
-st.title(f"Cronograma de Estudos - {CONCURSO}")
-
-# Sidebar para upload e data de início
-st.sidebar.header("Configurações")
-data_inicio = st.sidebar.date_input("Data de Início", datetime(2025, 10, 20))
-arquivo = st.sidebar.file_uploader("Upload do Edital Verticalizado (.xlsx)", type=["xlsx"])
-
-if arquivo:
-    col_disciplina = "Disciplina"
-    col_assunto = "Assunto"
-    col_carga = "Estudo (h)"
-
-    df_base = load_data(arquivo, cols=[col_disciplina, col_assunto, col_carga])
-
-    if df_base is not None:
-        cronograma = gerar_cronograma(df_base, col_disciplina, col_assunto, col_carga, data_inicio)
-
-        # Atualiza coluna "Já Estudada"
-        cronograma["Já Estudada"] = cronograma["id"].apply(
-            lambda x: "Sim" if x in st.session_state["progresso"] else "Não"
+        chave = ("json", PROGRESS_FILE)
+        backend = diario_progresso()
+    if GRAVACAO_ASSINCRONA:
+        backend = gravador_assincrono(chave, backend)
+    if PROGRESS_BACKEND == "sqlite":
+        return PerfilProgresso(backend, usuario, plano)
+    return backend
+
+def avancar_versao_progresso():
+    # Contador monotônico: muda a cada alteração do progresso da sessão
+    st.session_state["progresso_versao"] = st.session_state.get("progresso_versao", 0) + 1
+
+
+def inicializar_estatisticas(df, col_disciplina, col_assunto, col_carga, data_inicio, chave, extras=None):
+    # Recalcula só quando o cronograma (ou o progresso carregado) muda.
+    # `extras`: função que devolve (ids, disciplinas) de revisões que só
+    # existem no modo espaçado; só é chamada quando as estatísticas são refeitas
+    if st.session_state.get("estatisticas_chave") != chave:
+        compacto = gerar_cronograma_compacto(df, col_disciplina, col_assunto, col_carga, data_inicio)
+        estatisticas = EstatisticasProgresso(compacto)
+        if extras is not None:
+            estatisticas.acrescentar(*extras())
+        estatisticas.reconciliar(st.session_state["progresso"])
+        st.session_state["estatisticas"] = estatisticas
+        st.session_state["estatisticas_chave"] = chave
+    return st.session_state["estatisticas"]
+
+def inicializar_progresso(backend):
+    # Recarrega quando o backend/namespace da sessão muda (outro perfil ou edital)
+    if st.session_state.get("progresso_backend") == backend:
+        return
+    st.session_state["progresso_backend"] = backend
+    st.session_state["progresso"] = backend.carregar()
+    avancar_versao_progresso()
+    if backend.corrompido:
+        st.warning(
+            f"O arquivo de progresso estava corrompido e foi movido para "
+            f"{backend.corrompido}."
         )
 
-        total_itens = len(cronograma)
-        estudados = len(st.session_state["progresso"])
-        porcentagem = (estudados / total_itens * 100) if total_itens > 0 else 0
-
-        st.markdown(f"### Progresso geral: {estudados} / {total_itens} itens estudados ({porcentagem:.1f}%)")
-        st.progress(porcentagem / 100)
-
-        if total_itens == 0:
-            st.success("Parabéns! Você concluiu todos os estudos.")
-
+# Templates compilados uma vez; cada card vira um fragmento HTML reaproveitável
+TEMPLATE_CARD = string.Template(
+    '<div class="study-card card-$n$estado">'
+    '<p><strong>$data ($dia)</strong></p>'
+    '<p>$assunto</p>'
+    '<p style="font-size:14px; color:#555;">$disciplina</p>'
+    '<p style="font-size:12px; color:#555;">$tempo</p>'
+    '</div>'
+)
+TEMPLATE_CARD_VAZIO = string.Template(
+    '<div class="study-card card-$n" style="background: #f9f9f9; box-shadow:none;">'
+    '<p style="color:#bbb; text-align:center; margin-top: 50%;">Sem dado</p>'
+    '</div>'
+)
+TEMPLATE_SEMANA = string.Template(
+    "<div class='week-title'>Semana $numero</div><div class='week-grid'>$cards</div>"
+)
+TEMPLATE_LINHA = string.Template("<div class='week-grid'>$cards</div>")
+
+@st.cache_resource
+def cache_cards():
+    return CacheLRU(MAX_CARDS_CACHE)
+
+def html_card(posicao, row, concluido):
+    # Cache por (id, concluído); posição e data entram na chave porque mudam o HTML
+    chave = (int(row["id"]), concluido, posicao, row["Data"], row["Tempo"])
+    cache = cache_cards()
+    fragmento = cache.get(chave)
+    if fragmento is None:
+        fragmento = TEMPLATE_CARD.substitute(
+            n=posicao + 1,
+            estado=" concluido" if concluido else "",
+            data=html.escape(row["Data"]),
+            dia=html.escape(row["Dia da Semana"]),
+            assunto=html.escape(row["Assunto"]),
+            disciplina=html.escape(str(row["Disciplina"])),
+            tempo=html.escape(row["Tempo"]),
+        )
+        cache.put(chave, fragmento)
+    return fragmento
+
+def html_semana(numero, semana_df, progresso, itens_por_semana=6):
+    # Os 6 cards da linha num único elemento (um delta só no websocket);
+    # `numero` None omite o título (linhas seguintes de uma semana longa)
+    cards = []
+    for i in range(itens_por_semana):
+        if i < len(semana_df):
+            row = semana_df.iloc[i]
+            cards.append(html_card(i, row, int(row["id"]) in progresso))
         else:
-            # Mostrar todos itens, mudando a cor dos concluídos
-            total_dias = len(cronograma)
-            total_semanas = math.ceil(total_dias / 6) if total_dias > 0 else 1
-
-            semana_atual = st.slider(
-                "Semana",
-                min_value=1,
-                max_value=total_semanas,
-                value=1,
-                step=1,
-                help="Selecione a semana para visualizar"
-            )
+            cards.append(TEMPLATE_CARD_VAZIO.substitute(n=i + 1))
+    if numero is None:
+        return TEMPLATE_LINHA.substitute(cards="".join(cards))
+    return TEMPLATE_SEMANA.substitute(numero=numero, cards="".join(cards))
+
+@st.cache_resource
+def historico_reruns():
+    return deque(maxlen=MAX_RERUNS_PERFIL)
+
+def registrar_rerun(cronometro):
+    if cronometro.ativo:
+        historico_reruns().append(cronometro.registro())
+
+def pedir_perfil():
+    st.session_state["perfilar_proximo"] = True
+
+def perfilador():
+    # Profiler opcional de um único rerun, pedido pelo painel de desempenho
+    if ADMIN and st.session_state.pop("perfilar_proximo", False):
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+    return None
+
+@contextmanager
+def rerun_medido(cronometro, perfil):
+    # Fecha o registro deste rerun (e o perfil, se pedido)
+    try:
+        yield
+    finally:
+        st.session_state["cronometro_rerun"] = None
+        registrar_rerun(cronometro)
+        if perfil is not None:
+            perfil.disable()
+            nome = f"perfil_{time.strftime('%Y%m%d_%H%M%S')}.pstats"
+            caminho_perfil = os.path.join(PASTA_PERFIS, nome)
+            perfil.dump_stats(caminho_perfil)
+            st.session_state["ultimo_perfil"] = caminho_perfil
+
+def painel_desempenho():
+    with st.sidebar.expander("Desempenho (admin)"):
+        historico = list(historico_reruns())
+        if historico:
+            st.dataframe(historico[::-1], hide_index=True)
+        else:
+            st.caption("Nenhum rerun medido ainda.")
+        st.button("Perfilar próximo rerun (cProfile)", on_click=pedir_perfil)
+        if st.session_state.get("ultimo_perfil"):
+            st.caption(f"Último perfil: {st.session_state['ultimo_perfil']}")
+
+def toggle_progress(id_key):
+    progresso = st.session_state["progresso"]
+    if id_key in progresso:
+        progresso.pop(id_key)
+    else:
+        progresso[id_key] = True
+    avancar_versao_progresso()
+    st.session_state["estatisticas"].marcar(id_key, id_key in progresso)
+    st.session_state["progresso_backend"].registrar(id_key, id_key in progresso)
+    # Revisões espaçadas contam a partir do dia em que o assunto foi concluído;
+    # o dia fica gravado para o plano de um reload sair igual
+    motor = st.session_state.get("motor_revisoes")
+    if motor is not None:
+        _, visao, namespace = motor
+        data = date.today() if id_key in progresso else None
+        if visao.concluir(id_key, data):
+            datas_conclusao().registrar(id_key, data, *namespace)
+
+@st.fragment
+def painel_semana(visao, estatisticas, chave_plano, formato, opcoes):
+    # Rerun parcial: marcar um checkbox reexecuta só este bloco (cabeçalho de
+    # progresso, grade da semana e exportação), não o script inteiro.
+    inicio = time.perf_counter()
+    # No rerun completo as etapas entram no registro do script; sozinho, o
+    # fragmento gera o próprio registro
+    cronometro = st.session_state.get("cronometro_rerun")
+    proprio = cronometro is None
+    if proprio:
+        cronometro = Cronometro(ativo=ADMIN, tipo="fragmento")
+    total_itens = estatisticas.total
+    estudados = estatisticas.feitos
+    porcentagem = estatisticas.porcentagem
+
+    st.markdown(f"### Progresso geral: {estudados} / {total_itens} itens estudados ({porcentagem:.1f}%)")
+    st.progress(porcentagem / 100)
+    with st.expander("Progresso por disciplina"):
+        st.dataframe(estatisticas.por_disciplina(), hide_index=True)
+        st.dataframe(estatisticas.por_tipo(), hide_index=True)
+
+    if total_itens == 0:
+        st.success("Parabéns! Você concluiu todos os estudos.")
 
-            inicio = (semana_atual - 1) * 6
-            fim = inicio + 6
-            semana_df = cronograma.iloc[inicio:fim]
+    else:
+        # Mostrar todos itens, mudando a cor dos concluídos
+        total_semanas = visao.total_semanas
+
+        semana_atual = st.slider(
+            "Semana",
+            min_value=1,
+            max_value=total_semanas,
+            value=1,
+            step=1,
+            help="Selecione a semana para visualizar"
+        )
 
-            st.markdown(f"<div class='week-title'>Semana {semana_atual}</div>", unsafe_allow_html=True)
+        with cronometro.etapa("datas"):
+            semana_df = formatar_datas(visao.semana(semana_atual))
 
-            cols = st.columns(6)
+        with cronometro.etapa("cards"):
+            progresso = st.session_state["progresso"]
+            # Semanas com orçamento de horas podem ter mais de 6 itens: uma linha de 6 por vez
+            for inicio_linha in range(0, max(len(semana_df), 1), 6):
+                linha_df = semana_df.iloc[inicio_linha:inicio_linha + 6]
+                titulo = semana_atual if inicio_linha == 0 else None
+                st.markdown(html_semana(titulo, linha_df, progresso), unsafe_allow_html=True)
 
-            def toggle_progress(id_key):
-                progresso = st.session_state["progresso"]
-                if id_key in progresso:
-                    progresso.pop(id_key)
-                else:
-                    progresso[id_key] = True
-                salvar_progresso(progresso)
-
-            for i in range(6):
-                with cols[i]:
-                    if i < len(semana_df):
-                        row = semana_df.iloc[i]
-                        concluido = row["id"] in st.session_state["progresso"]
-
-                        card_classes = f"study-card card-{i+1}"
-                        if concluido:
-                            card_classes += " concluido"
-
-                        st.markdown(f"""
-                            <div class="{card_classes}">
-                                <p><strong>{row['Data']} ({row['Dia da Semana']})</strong></p>
-                                <p>{row['Assunto']}</p>
-                                <p style="font-size:14px; color:#555;">{row['Disciplina']}</p>
-                                <p style="font-size:12px; color:#555;">{row['Tempo']}</p>
-                            </div>
-                        """, unsafe_allow_html=True)
-
-                        checked = concluido
+                cols = st.columns(6)
 
+                for i in range(len(linha_df)):
+                    with cols[i]:
+                        id_key = int(linha_df["id"].iat[i])
                         st.checkbox(
                             "Conteúdo Concluído",
-                            value=checked,
-                            key=row["id"],
+                            value=id_key in progresso,
+                            key=f"item-{id_key}",
                             on_change=toggle_progress,
-                            args=(row["id"],)
+                            args=(id_key,)
                         )
-                    else:
-                        st.markdown(f"""
-                            <div class="study-card card-{i+1}" style="background: #f9f9f9; box-shadow:none;">
-                                <p style="color:#bbb; text-align:center; margin-top: 50%;">Sem dado</p>
-                            </div>
-                        """, unsafe_allow_html=True)
-
-        # Botão para resetar progresso
-        if st.sidebar.button("Resetar Progresso"):
-            st.session_state["progresso"] = {}
-            if os.path.exists(PROGRESS_FILE):
-                os.remove(PROGRESS_FILE)
-            st.experimental_rerun()
-
-        # Botão para download do cronograma atualizado
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            cronograma.to_excel(writer, index=False, sheet_name='Cronograma')
-        output.seek(0)
 
+    # Botão para download do cronograma atualizado. O arquivo só é gerado
+    # sob demanda e fica guardado enquanto plano, data e progresso não mudam.
+    exportador, nome_arquivo, mime = FORMATOS_EXPORT[formato]
+    chave_export = (
+        *chave_plano, formato, tuple(opcoes.items()), st.session_state["progresso_versao"],
+    )
+    if st.session_state.get("export_chave") != chave_export:
+        if st.button(f"Gerar cronograma completo ({formato})"):
+            with cronometro.etapa("exportacao"):
+                st.session_state["export_bytes"] = exportador(
+                    visao, st.session_state["progresso"], **opcoes
+                )
+            st.session_state["export_chave"] = chave_export
+
+    if st.session_state.get("export_chave") == chave_export:
         st.download_button(
-            label="Baixar cronograma completo (Excel)",
-            data=output,
-            file_name="Cronograma_Estudos.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            label=f"Baixar cronograma completo ({formato})",
+            data=st.session_state["export_bytes"],
+            file_name=nome_arquivo,
+            mime=mime
         )
 
-else:
-    st.info("Faça upload do arquivo Excel com o edital verticalizado.")
+    # Medição: tempo deste rerun parcial vs. o último rerun completo do script
+    # (só para administradores; o registro do rerun continua para todos)
+    tempo = (time.perf_counter() - inicio) * 1000
+    tempo_script = st.session_state.get("tempo_script_ms")
+    if ADMIN and tempo_script is not None:
+        st.caption(f"Atualização da semana: {tempo:.0f} ms · rerun completo: {tempo_script:.0f} ms")
+    if proprio:
+        registrar_rerun(cronometro)
+
+# O corpo do script roda dentro de rerun_medido: o registro do rerun e o
+# perfil são fechados mesmo se ele sair antes (exceção ou st.rerun())
+with rerun_medido(cronometro, perfilador()):
+    # Sidebar para upload e data de início
+    st.sidebar.header("Configurações")
+    data_inicio = st.sidebar.date_input("Data de Início", datetime(2025, 10, 20))
+    arquivos = st.sidebar.file_uploader(
+        "Upload do(s) Edital(is) Verticalizado(s) (.xlsx)", type=["xlsx"], accept_multiple_files=True
+    )
+    if not CACHE_DISCO_ATIVO:
+        st.sidebar.caption("Cache em disco dos editais desativado: instale o pyarrow.")
+    # Ordem estável: o mesmo conjunto de editais gera sempre o mesmo plano
+    arquivos = sorted(arquivos or [], key=lambda a: a.name)
+
+    concursos = [nome_concurso(a.name) for a in arquivos]
+    st.title(f"Cronograma de Estudos - {' + '.join(concursos) if concursos else CONCURSO}")
+    # Orçamento diário: várias Partes por dia em vez de uma por dia
+    orcamento = None
+    if st.sidebar.checkbox("Orçamento diário de horas"):
+        horas_semana = st.sidebar.number_input("Horas Seg–Sex", 0.0, 24.0, 3.0, 0.5)
+        horas_sabado = st.sidebar.number_input("Horas Sábado", 0.0, 24.0, 6.0, 0.5)
+        horas_domingo = st.sidebar.number_input("Horas Domingo", 0.0, 24.0, 0.0, 0.5)
+        orcamento = (horas_semana,) * 5 + (horas_sabado, horas_domingo)
+        if max(orcamento) <= 0:
+            st.sidebar.warning("Defina horas para ao menos um dia; usando um item por dia.")
+            orcamento = None
+    # Revisões espaçadas: D+1, D+7, D+30... após concluir cada assunto
+    intervalos = None
+    if orcamento is None and st.sidebar.checkbox("Revisões espaçadas"):
+        texto = st.sidebar.text_input(
+            "Intervalos (dias)", ", ".join(str(i) for i in INTERVALOS_REVISAO)
+        )
+        try:
+            intervalos = tuple(sorted({int(i) for i in texto.replace(";", ",").split(",") if i.strip()}))
+        except ValueError:
+            intervalos = ()
+        if not intervalos or intervalos[0] <= 0:
+            st.sidebar.warning("Use dias inteiros positivos separados por vírgula; sem revisões espaçadas.")
+            intervalos = None
+    # Intercalar: alterna as disciplinas em vez de estudar uma inteira por vez
+    intercalar = (
+        orcamento is None and intervalos is None and st.sidebar.checkbox("Intercalar disciplinas")
+    )
+    pesos = None
+    usuario = "padrao"
+    if PROGRESS_BACKEND == "sqlite":
+        usuario = st.sidebar.text_input("Perfil", value="padrao") or "padrao"
+
+    if arquivos:
+        col_disciplina = "Disciplina"
+        col_assunto = "Assunto"
+        col_carga = "Estudo (h)"
+
+        with cronometro.etapa("parse"):
+            editais, hashes, erros = carregar_editais(arquivos, [col_disciplina, col_assunto, col_carga])
+            for nome, erro in erros:
+                st.error(f"Erro ao carregar o arquivo {nome}: {erro}")
+            if len(hashes) == 1:
+                plano_id = next(iter(hashes.values()))
+            else:
+                plano_id = hash_arquivo("".join(hashes.values()).encode("ascii"))
+            if erros or not editais:
+                df_base = None
+            elif len(editais) == 1:
+                df_base = next(iter(editais.values()))
+            else:
+                # O plano mesclado também fica no LRU, para não refazer a junção a cada rerun
+                chave_mesclado = (plano_id, "mesclado")
+                df_base = cache_editais().get(chave_mesclado)
+                if df_base is None:
+                    df_base = mesclar_editais(editais, col_disciplina, col_assunto, col_carga)
+                    cache_editais().put(chave_mesclado, df_base)
+        with cronometro.etapa("carregar_progresso"):
+            inicializar_progresso(backend_progresso(usuario, plano_id))
+
+        if df_base is not None:
+            if intercalar:
+                # Peso 2 = a disciplina aparece duas vezes mais que as de peso 1
+                with st.sidebar.expander("Pesos das disciplinas"):
+                    pesos = {
+                        disciplina: st.number_input(disciplina, 0.1, 10.0, 1.0, 0.5, key=f"peso-{disciplina}")
+                        for disciplina in sorted(df_base[col_disciplina].dropna().unique())
+                    }
+            with cronometro.etapa("expansao"):
+                indice = IndiceAssuntos(df_base, col_disciplina, col_assunto, col_carga)
+                if intervalos is not None:
+                    # O motor guarda as conclusões e replaneja incrementalmente,
+                    # então sobrevive aos reruns enquanto o plano não mudar
+                    namespace = (usuario, plano_id)
+                    chave_motor = (namespace, data_inicio.isoformat(), intervalos)
+                    motor = st.session_state.get("motor_revisoes")
+                    if motor is None or motor[0] != chave_motor:
+                        visao = VisaoRevisoes(indice, data_inicio, intervalos)
+                        visao.aplicar_conclusoes(datas_conclusao().carregar(*namespace))
+                        motor = (chave_motor, visao, namespace)
+                        st.session_state["motor_revisoes"] = motor
+                    visao = motor[1]
+                else:
+                    st.session_state.pop("motor_revisoes", None)
+                    if pesos is not None:
+                        visao = VisaoIntercalada(indice, data_inicio, pesos)
+                    elif orcamento is None:
+                        visao = VisaoCronograma(indice, data_inicio)
+                    else:
+                        visao = VisaoOrcamento(indice, data_inicio, orcamento)
+
+            with cronometro.etapa("juncao_progresso"):
+                estatisticas = inicializar_estatisticas(
+                    df_base, col_disciplina, col_assunto, col_carga, data_inicio,
+                    (plano_id, id(st.session_state["progresso_backend"]), intervalos),
+                    visao.revisoes_extras if intervalos is not None else None,
+                )
+            # Botão para resetar progresso
+            if st.sidebar.button("Resetar Progresso"):
+                st.session_state["progresso"] = {}
+                st.session_state["estatisticas"].reconciliar({})
+                avancar_versao_progresso()
+                st.session_state["progresso_backend"].resetar()
+                datas_conclusao().resetar(usuario, plano_id)
+                st.session_state.pop("motor_revisoes", None)
+                st.rerun()
+
+            backend = st.session_state["progresso_backend"]
+            if isinstance(backend, PerfilProgresso):
+                backend = backend.backend
+            if isinstance(backend, GravadorAssincrono):
+                st.sidebar.caption(
+                    f"Gravação em segundo plano: {backend.pendentes} pendentes, "
+                    f"{backend.gravados} gravados"
+                )
+                if backend.erro:
+                    st.sidebar.error(f"Erro ao gravar progresso: {backend.erro}")
+
+            formato = st.sidebar.selectbox("Formato de download", list(FORMATOS_EXPORT))
+            opcoes = {}
+            if formato == "Excel":
+                opcoes["por_disciplina"] = st.sidebar.checkbox("Excel com uma aba por disciplina")
+
+            painel_semana(
+                visao, estatisticas,
+                (plano_id, data_inicio.isoformat(), orcamento, intervalos, tuple(sorted((pesos or {}).items()))),
+                formato, opcoes,
+            )
+
+            st.session_state["tempo_script_ms"] = (time.perf_counter() - INICIO_RERUN) * 1000
+
+    else:
+        st.info("Faça upload do arquivo Excel com o edital verticalizado.")
+
+if ADMIN:
+    painel_desempenho()
 
 # import streamlit as st
 # import pandas as pd
@@ -378,7 +680,7 @@ else:
 #     data_atual = data_inicio
 #     linhas = []
 
-#     for disc, assunto, tipo in plano:
+#     for disc, assunto, tipo in plano.itertuples(index=False):
 #         while data_atual.weekday() == 6:  # !=  domingo
 #             data_atual += timedelta(days=1)
 
@@ -654,7 +956,7 @@ else:
 #     data_atual = data_inicio
 #     linhas = []
 
-#     for disc, assunto, tipo in plano:
+#     for disc, assunto, tipo in plano.itertuples(index=False):
 #         while data_atual.weekday() == 6:  # Pular domingos
 #             data_atual += timedelta(days=1)
 
@@ -900,7 +1202,7 @@ else:
 #     data_atual = data_inicio
 #     linhas = []
 
-#     for disc, assunto, tipo in plano:
+#     for disc, assunto, tipo in plano.itertuples(index=False):
 #         while data_atual.weekday() == 6:  # Pular domingos
 #             data_atual += timedelta(days=1)
 
@@ -1111,7 +1413,7 @@ else:
 #     data_atual = data_inicio
 #     linhas = []
 
-#     for disc, assunto, tipo in plano:
+#     for disc, assunto, tipo in plano.itertuples(index=False):
 #         while data_atual.weekday() == 6:
 #             data_atual += timedelta(days=1)
 
@@ -1237,7 +1539,7 @@ else:
 # #     data_atual = data_inicio
 # #     linhas = []
 
-# #     for disc, assunto, tipo in plano:
+# #     for disc, assunto, tipo in plano.itertuples(index=False):
 # #         while data_atual.weekday() == 6:
 # #             data_atual += timedelta(days=1)
 
@@ -0,0 +1,177 @@
+# Benchmark das etapas do cronograma com editais sintéticos de 10^2 a 10^6
+# assuntos, mais o edital real da PRF 2024.
+#
+#   python stremlit/cronograma_bench.py --tamanhos 100 10000 --saida bench.json
+#
+# Cada etapa (leitura do .xlsx, expansão, cronograma completo, os caminhos do
+# app: semana, cronograma compacto, estatísticas e lotes com "Já Estudada", e
+# a exportação Excel) é cronometrada separadamente e de ponta a ponta. O pico
+# de memória vem de uma segunda execução com tracemalloc, para não distorcer
+# o tempo. O JSON gerado pode ser comparado entre execuções.
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from cronograma_core import (
+    EstatisticasProgresso, IndiceAssuntos, VisaoCronograma, exportar_excel, expandir_assuntos,
+    gerar_cronograma, gerar_cronograma_compacto, load_data, lotes_cronograma,
+)
+
+COLS = ["Disciplina", "Assunto", "Estudo (h)"]
+EDITAL_PRF = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "Edital_Verticalizado",
+    "EditalVerticalizado-PRF_2024.xlsx",
+)
+TAMANHOS_PADRAO = [100, 1000, 10000, 100000, 1000000]
+DATA_INICIO = date(2025, 10, 20)
+
+
+def edital_sintetico(n_assuntos, n_disciplinas=12, max_horas=4, fracao_decimal=0.3, semente=0):
+    # Carga inteira uniforme em 1..max_horas; uma fração dos assuntos ganha
+    # ainda uma "Parte final" de 0.1h a 0.9h
+    rng = np.random.default_rng(semente)
+    disciplinas = np.array([f"Disciplina {i + 1:02d}" for i in range(n_disciplinas)], dtype=object)
+    horas = rng.integers(1, max_horas + 1, n_assuntos).astype(float)
+    com_decimal = rng.random(n_assuntos) < fracao_decimal
+    horas[com_decimal] += rng.integers(1, 10, int(com_decimal.sum())) / 10
+    return pd.DataFrame({
+        "Disciplina": disciplinas[rng.integers(0, n_disciplinas, n_assuntos)],
+        "Assunto": [f"Assunto {i + 1}" for i in range(n_assuntos)],
+        "Estudo (h)": horas,
+        # Coluna extra, como nos editais reais, que a leitura deveria ignorar
+        "Observação": "Leitura + Resumo + Questões",
+    })
+
+
+def salvar_xlsx(df, caminho):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Edital")
+    ws.append(list(df.columns))
+    for linha in df.itertuples(index=False, name=None):
+        ws.append(linha)
+    wb.save(caminho)
+
+
+def medir(fn):
+    # Tempo sem tracemalloc; pico de memória numa segunda execução rastreada
+    inicio = time.perf_counter()
+    resultado = fn()
+    segundos = time.perf_counter() - inicio
+    del resultado
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"segundos": round(segundos, 6), "pico_mb": round(pico / 2**20, 3)}
+
+
+def estatisticas(df, progresso):
+    # Mesmo caminho do app: cronograma compacto + reconciliação com o progresso
+    compacto = gerar_cronograma_compacto(df, *COLS, DATA_INICIO)
+    resultado = EstatisticasProgresso(compacto)
+    resultado.reconciliar(progresso)
+    return resultado
+
+
+def todos_os_lotes(visao, progresso):
+    # "Já Estudada" do plano inteiro, em lotes, como fazem os exportadores
+    return sum(len(lote) for lote in lotes_cronograma(visao, progresso))
+
+
+def rodar(caminho, pular_excel=False):
+    etapas = {}
+    df = load_data(caminho, cols=COLS)
+    etapas["load_data"] = medir(lambda: load_data(caminho, cols=COLS))
+    etapas["expandir_assuntos"] = medir(lambda: expandir_assuntos(df, *COLS))
+    etapas["gerar_cronograma"] = medir(lambda: gerar_cronograma(df, *COLS, DATA_INICIO))
+
+    # Metade dos itens marcada como concluída
+    cronograma = gerar_cronograma(df, *COLS, DATA_INICIO)
+    progresso = dict.fromkeys(cronograma["id"].to_numpy()[::2].tolist(), True)
+
+    visao = VisaoCronograma(IndiceAssuntos(df, *COLS), DATA_INICIO)
+    semana_do_meio = (visao.total_semanas + 1) // 2
+    etapas["semana"] = medir(lambda: visao.semana(semana_do_meio))
+    etapas["cronograma_compacto"] = medir(lambda: gerar_cronograma_compacto(df, *COLS, DATA_INICIO))
+    etapas["estatisticas"] = medir(lambda: estatisticas(df, progresso))
+    etapas["lotes_cronograma"] = medir(lambda: todos_os_lotes(visao, progresso))
+    if not pular_excel:
+        with tempfile.TemporaryDirectory() as pasta:
+            destino = os.path.join(pasta, "cronograma.xlsx")
+            etapas["exportar_excel"] = medir(lambda: exportar_excel(visao, progresso, destino))
+
+    def ponta_a_ponta():
+        # O que um rerun do app faz: leitura, índice, estatísticas e uma semana
+        df = load_data(caminho, cols=COLS)
+        visao = VisaoCronograma(IndiceAssuntos(df, *COLS), DATA_INICIO)
+        estatisticas(df, progresso)
+        visao.semana(semana_do_meio)
+        if not pular_excel:
+            exportar_excel(visao, progresso)
+
+    etapas["ponta_a_ponta"] = medir(ponta_a_ponta)
+    return {"assuntos": len(df), "itens": len(cronograma), "etapas": etapas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do cronograma.")
+    parser.add_argument("--tamanhos", type=int, nargs="*", default=TAMANHOS_PADRAO,
+                        help="números de assuntos dos editais sintéticos")
+    parser.add_argument("--disciplinas", type=int, default=12)
+    parser.add_argument("--max-horas", type=int, default=4, help="carga inteira máxima por assunto")
+    parser.add_argument("--fracao-decimal", type=float, default=0.3,
+                        help="fração dos assuntos com carga fracionária")
+    parser.add_argument("--sem-prf", action="store_true", help="não incluir o edital real da PRF 2024")
+    parser.add_argument("--sem-excel", action="store_true", help="pular a exportação Excel")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados")
+    args = parser.parse_args(argv)
+
+    resultados = {
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "parametros": vars(args),
+        "editais": {},
+    }
+
+    fixtures = []
+    if not args.sem_prf and os.path.exists(EDITAL_PRF):
+        fixtures.append(("PRF_2024", EDITAL_PRF))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in args.tamanhos:
+            caminho = os.path.join(pasta, f"sintetico_{n}.xlsx")
+            salvar_xlsx(
+                edital_sintetico(n, args.disciplinas, args.max_horas, args.fracao_decimal), caminho
+            )
+            fixtures.append((f"sintetico_{n}", caminho))
+
+        for nome, caminho in fixtures:
+            r = rodar(caminho, pular_excel=args.sem_excel)
+            resultados["editais"][nome] = r
+            resumo = ", ".join(
+                f"{etapa} {m['segundos']:.3f}s/{m['pico_mb']:.1f}MB" for etapa, m in r["etapas"].items()
+            )
+            print(f"{nome} ({r['assuntos']} assuntos, {r['itens']} itens): {resumo}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
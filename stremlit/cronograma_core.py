@@ -0,0 +1,1437 @@
+# Núcleo do cronograma, sem Streamlit: leitura do edital, expansão em Partes,
+# datas, progresso e exportação. Pode ser importado por workers, testes e jobs
+# em lote; o app (cronograma_app.py) é só a camada de interface.
+import pandas as pd
+import numpy as np
+from datetime import date, datetime, timedelta, timezone
+import io
+import math
+import json
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+import tempfile
+import sqlite3
+import queue
+import atexit
+import time
+import heapq
+import bisect
+from collections import OrderedDict, namedtuple
+from itertools import islice
+
+import openpyxl
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional
+    pa = pq = None
+CACHE_DISCO_ATIVO = pq is not None  # o cache colunar em disco só grava Parquet
+
+
+# Configurações
+DIAS_SEMANA = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]  # weekday() 0..6; só o orçamento usa o domingo
+TEMPO_PADRAO = "1h Estudo"
+SEMANA_ESTUDO = "1111110"  # Seg–Sáb, domingo livre
+ORCAMENTO_PADRAO = (1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 0.0)  # horas por dia, Seg..Dom
+INTERVALOS_REVISAO = (1, 7, 30)  # revisões espaçadas: D+1, D+7, D+30
+DIAS_CHECKPOINT = 7  # a cada quantos dias o motor de revisões guarda o estado
+HORAS_PADRAO = 1.0  # mesmo valor de TEMPO_PADRAO, em formato numérico
+FORMATO_DATA = "%d/%m/%Y"
+PROGRESS_FILE = "progresso_estudos.json"
+PROGRESS_DB = "progresso_estudos.db"
+CONCLUSOES_FILE = "progresso_revisoes.json"  # dia de conclusão dos assuntos (revisões espaçadas)
+LIMITE_DIARIO = 64 * 1024  # bytes do diário de progresso antes de compactar
+GRAVACAO_INTERVALO_MS = 500
+GRAVACAO_MAX_PENDENTES = 1000
+CONCURSO = "Polícia Rodoviaria Federal"
+LINHAS_POR_LOTE = 5000  # linhas do cronograma geradas por vez na exportação
+CACHE_COLUNAR = os.environ.get("CRONOGRAMA_CACHE_EDITAIS", ".cache_editais")  # cópias colunares dos editais
+COLUNAS_NUMERICAS = {"Estudo (h)"}
+MAX_LINHAS_EXCEL = 1_048_576  # limite de linhas por aba do Excel (com o cabeçalho)
+COLUNAS_EXPORT = ["id", "Data", "Dia da Semana", "Disciplina", "Assunto", "Tipo", "Tempo", "Já Estudada"]
+COL_CONCURSOS = "Concursos"  # tags do plano mesclado de vários editais
+
+# --- Funções ---
+
+class _Etapa:
+    def __init__(self, cronometro, nome):
+        self.cronometro = cronometro
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        etapas = self.cronometro.etapas
+        etapas[self.nome] = etapas.get(self.nome, 0.0) + (time.perf_counter() - self.inicio) * 1000
+        return False
+
+class _SemMedicao:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_SEM_MEDICAO = _SemMedicao()
+
+class Cronometro:
+    # Tempo (ms) de cada etapa de um rerun: `with cronometro.etapa("parse"): ...`.
+    # Desligado, etapa() devolve sempre o mesmo contexto vazio, sem medir nada.
+    def __init__(self, ativo=True, tipo="rerun"):
+        self.ativo = ativo
+        self.tipo = tipo
+        self.etapas = {}
+        self.quando = datetime.now()
+        self.inicio = time.perf_counter()
+
+    def etapa(self, nome):
+        if not self.ativo:
+            return _SEM_MEDICAO
+        return _Etapa(self, nome)
+
+    def registro(self):
+        return {
+            "quando": self.quando.strftime("%H:%M:%S"),
+            "tipo": self.tipo,
+            "total_ms": round((time.perf_counter() - self.inicio) * 1000, 1),
+            **{nome: round(ms, 1) for nome, ms in self.etapas.items()},
+        }
+
+def load_data(file, cols=None):
+    if not cols:
+        return pd.read_excel(file)
+    return ler_colunas_xlsx(file, cols)
+
+def ler_colunas_xlsx(file, cols):
+    # Leitura em streaming (openpyxl read_only, só valores) da primeira aba,
+    # guardando apenas as colunas pedidas; estilos e demais colunas nunca
+    # viram objetos Python. Colunas numéricas saem float64, o resto object.
+    valores = [[] for _ in cols]
+    for selecionados in linhas_edital(file, cols):
+        for coluna, v in zip(valores, selecionados):
+            coluna.append(v)
+    return pd.DataFrame({
+        c: (pd.to_numeric(pd.Series(v, dtype=object)).astype("float64")
+            if c in COLUNAS_NUMERICAS else pd.Series(v, dtype=object))
+        for c, v in zip(cols, valores)
+    })
+
+def linhas_edital(file, cols):
+    # Gerador preguiçoso: uma tupla com os valores de `cols` por linha não vazia
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [str(c).strip() if c is not None else None for c in next(linhas, ())]
+        faltando = [c for c in cols if c not in cabecalho]
+        if faltando:
+            raise KeyError(f"Colunas ausentes no edital: {faltando}")
+        posicoes = [cabecalho.index(c) for c in cols]
+        for linha in linhas:
+            selecionados = tuple(linha[p] if p < len(linha) else None for p in posicoes)
+            if all(v is None for v in selecionados):
+                continue  # linha em branco, como o read_excel faz
+            yield selecionados
+    finally:
+        wb.close()
+
+def caminho_colunar(hash_dados, cols, pasta=CACHE_COLUNAR):
+    sufixo = hashlib.sha256("\x1f".join(cols or ()).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(pasta, f"{hash_dados}-{sufixo}.parquet")
+
+def load_data_colunar(file, cols, hash_dados, pasta=CACHE_COLUNAR):
+    # Cache em disco: no primeiro parse grava uma cópia Parquet com o hash do
+    # arquivo no nome; leituras seguintes do mesmo edital, inclusive após
+    # reiniciar o servidor, pulam o .xlsx. Sem pyarrow não há cache em disco:
+    # pickle numa pasta configurável executaria código de quem escreve nela.
+    if pq is None:
+        return load_data(file, cols=cols)
+    caminho = caminho_colunar(hash_dados, cols, pasta)
+    if os.path.exists(caminho):
+        try:
+            return pd.read_parquet(caminho)
+        except Exception:
+            os.remove(caminho)  # cópia inválida: refaz a partir do .xlsx
+    df = load_data(file, cols=cols)
+    os.makedirs(pasta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=pasta)
+    os.close(fd)
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, caminho)
+    except Exception:
+        # Sem cópia colunar (ex.: coluna com tipos mistos): só perde o atalho
+        pass
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return df
+
+def hash_arquivo(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+def id_item(texto):
+    # Id estável de 64 bits (63 úteis, cabe em int64) derivado de "{disciplina}::{assunto}"
+    digest = hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+def ids_itens(textos):
+    return np.fromiter((id_item(t) for t in textos), dtype=np.int64, count=len(textos))
+
+def chave_progresso(valor):
+    # Aceita ids novos (int ou texto numérico) e chaves antigas "disc::assunto"
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if valor.isdigit():
+        return int(valor)
+    return id_item(valor)
+
+class CacheLRU:
+    # Cache limitado com descarte do item usado há mais tempo (LRU)
+    def __init__(self, max_itens):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            if chave not in self._itens:
+                return None
+            self._itens.move_to_end(chave)
+            return self._itens[chave]
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class IndiceAssuntos:
+    # Índice por assunto: quantas linhas (Partes + Parte final + Revisão) cada
+    # assunto gera e a soma acumulada delas, para localizar qualquer slot do
+    # plano sem expandi-lo inteiro.
+    def __init__(self, df, col_disciplina, col_assunto, col_carga):
+        # Mantém a ordem do groupby (disciplinas ordenadas, assuntos na ordem do arquivo)
+        base = df[df[col_disciplina].notna()]
+        base = base.sort_values(col_disciplina, kind="stable")
+
+        carga = base[col_carga].to_numpy(dtype=float)
+        if np.isnan(carga).any():
+            raise ValueError(f"Coluna '{col_carga}' possui valores vazios")
+
+        carga_int = np.trunc(carga)
+        self.carga_decimal = carga - carga_int
+        self.n_partes = np.maximum(carga_int, 0).astype(np.int64)
+        self.tem_final = self.carga_decimal > 0
+        self.n_linhas = self.n_partes + self.tem_final + 1
+        self.fim = np.cumsum(self.n_linhas)
+        self.inicio = self.fim - self.n_linhas
+
+        self.disciplinas = base[col_disciplina].to_numpy(dtype=object)
+        self.assuntos = base[col_assunto].astype(str).to_numpy(dtype=object)
+        # Plano mesclado (mesclar_editais): de quais concursos vem cada assunto
+        self.concursos = (
+            base[COL_CONCURSOS].to_numpy(dtype=object) if COL_CONCURSOS in base else None
+        )
+
+    @property
+    def total(self):
+        return int(self.fim[-1]) if len(self.fim) else 0
+
+    def topicos(self, slots):
+        return np.searchsorted(self.fim, slots, side="right")
+
+    def montar(self, slots, topico=None):
+        # Monta Disciplina/Assunto/Tipo apenas para as posições pedidas
+        if topico is None:
+            topico = self.topicos(slots)
+        pos = slots - self.inicio[topico]
+
+        n_partes = self.n_partes[topico]
+        assuntos = self.assuntos[topico]
+        eh_parte = pos < n_partes
+        eh_revisao = pos == (self.n_linhas[topico] - 1)
+        eh_final = ~eh_parte & ~eh_revisao
+
+        rotulos = np.empty(len(slots), dtype=object)
+        numeros = (pos[eh_parte] + 1).astype(str).astype(object)
+        rotulos[eh_parte] = assuntos[eh_parte] + " - Parte " + numeros
+        sufixos = np.array(
+            [f" - Parte final ({d:.1f}h)" for d in self.carga_decimal[topico[eh_final]]],
+            dtype=object,
+        )
+        rotulos[eh_final] = assuntos[eh_final] + sufixos
+        rotulos[eh_revisao] = "Revisão " + assuntos[eh_revisao]
+
+        plano = pd.DataFrame({
+            "Disciplina": self.disciplinas[topico],
+            "Assunto": rotulos,
+            "Tipo": np.where(eh_revisao, "Revisão", "Estudo").astype(object),
+        })
+        if self.concursos is not None:
+            plano[COL_CONCURSOS] = self.concursos[topico]
+        return plano
+
+def expandir_assuntos(df, col_disciplina, col_assunto, col_carga):
+    # Versão colunar: calcula quantas Partes cada assunto gera e monta todas as
+    # linhas de uma vez com np.repeat, sem iterar linha a linha.
+    indice = IndiceAssuntos(df, col_disciplina, col_assunto, col_carga)
+    slots = np.arange(indice.total)
+    topico = np.repeat(np.arange(len(indice.n_linhas)), indice.n_linhas)
+    return indice.montar(slots, topico)
+
+def datas_dos_slots(data_inicio, slots):
+    # Slot k cai no k-ésimo dia útil (Seg–Sáb) a partir de data_inicio;
+    # roll="forward" empurra um início em domingo para a segunda-feira.
+    inicio = np.datetime64(pd.Timestamp(data_inicio).date(), "D")
+    return np.busday_offset(inicio, slots, roll="forward", weekmask=SEMANA_ESTUDO)
+
+def montar_cronograma(plano, datas, tempos=None):
+    # 1970-01-01 foi uma quinta-feira (weekday 3)
+    dia_semana = (datas.astype(np.int64) + 3) % 7
+
+    disciplinas = plano["Disciplina"].to_numpy(dtype=object)
+    assuntos = plano["Assunto"].to_numpy(dtype=object)
+
+    cronograma = pd.DataFrame({
+        "id": ids_itens(disciplinas + "::" + assuntos),
+        "Data": datas.astype("datetime64[ns]"),
+        "Dia da Semana": np.array(DIAS_SEMANA, dtype=object)[dia_semana],
+        "Disciplina": disciplinas,
+        "Assunto": assuntos,
+        "Tipo": plano["Tipo"].to_numpy(dtype=object),
+        "Tempo": TEMPO_PADRAO if tempos is None else tempos,
+    })
+    if COL_CONCURSOS in plano:
+        cronograma[COL_CONCURSOS] = plano[COL_CONCURSOS].to_numpy(dtype=object)
+    return cronograma
+
+def nome_concurso(nome_arquivo):
+    # "EditalVerticalizado-PRF_2024.xlsx" -> "PRF 2024"
+    nome = os.path.splitext(os.path.basename(nome_arquivo))[0]
+    nome = re.sub(r"^edital[ _-]*verticalizado[ _-]*", "", nome, flags=re.IGNORECASE)
+    return nome.replace("_", " ").strip() or nome_arquivo
+
+def normalizar_texto(serie):
+    # Chave de comparação: sem acentos, caixa e espaços repetidos
+    return (
+        serie.astype(str).str.normalize("NFKD")
+        .map(lambda s: "".join(c for c in s if not unicodedata.combining(c)))
+        .str.casefold().str.split().str.join(" ")
+    )
+
+def mesclar_editais(editais, col_disciplina, col_assunto, col_carga):
+    # Junta vários editais ({concurso: df}) num plano só. Assuntos iguais após
+    # normalização (mesma Disciplina/Assunto) viram uma linha, via agregação
+    # por hash da chave, mantendo a maior carga e a lista de concursos. Cada
+    # disciplina normalizada fica com um só rótulo (a primeira grafia vista),
+    # senão "Direito Penal" e "direito penal" virariam duas disciplinas no plano.
+    partes = [
+        df[[col_disciplina, col_assunto, col_carga]].assign(**{COL_CONCURSOS: concurso})
+        for concurso, df in editais.items()
+    ]
+    todos = pd.concat(partes, ignore_index=True)
+    todos = todos[todos[col_disciplina].notna()]
+    chave_disciplina = normalizar_texto(todos[col_disciplina])
+    todos = todos.assign(**{
+        col_disciplina: todos[col_disciplina].groupby(chave_disciplina, sort=False).transform("first")
+    })
+    chave = chave_disciplina + "\x1f" + normalizar_texto(todos[col_assunto])
+    grupos = todos.groupby(chave, sort=False)
+    return pd.DataFrame({
+        col_disciplina: grupos[col_disciplina].first(),
+        col_assunto: grupos[col_assunto].first(),
+        col_carga: grupos[col_carga].max(),
+        COL_CONCURSOS: grupos[COL_CONCURSOS].agg(lambda s: ", ".join(dict.fromkeys(s))),
+    }).reset_index(drop=True)
+
+def gerar_cronograma(df, col_disciplina, col_assunto, col_carga, data_inicio):
+    plano = expandir_assuntos(df, col_disciplina, col_assunto, col_carga)
+    datas = datas_dos_slots(data_inicio, np.arange(len(plano)))
+    return montar_cronograma(plano, datas)
+
+class CronogramaCompacto:
+    # Cronograma em formato colunar enxuto: Disciplina, Tipo e Dia da Semana
+    # como categóricos, a data como offset int32 em dias desde data_inicio,
+    # Tempo numérico e o id como chave inteira (a posição do slot no plano).
+    # Serve de base para as EstatisticasProgresso: os ids de 64 bits saem do
+    # índice de assuntos em `todos_ids`, sem guardar o texto das linhas. A
+    # grade e os exportadores montam as linhas largas pelas Visao*.
+    def __init__(self, indice, data_inicio):
+        self.indice = indice
+        self.inicio = np.datetime64(pd.Timestamp(data_inicio).date(), "D")
+
+        slots = np.arange(indice.total, dtype=np.int32)
+        topico = np.repeat(np.arange(len(indice.n_linhas), dtype=np.int32), indice.n_linhas)
+        pos = slots - indice.inicio[topico]
+        eh_revisao = pos == (indice.n_linhas[topico] - 1)
+
+        datas = datas_dos_slots(data_inicio, slots)
+        dia_semana = (datas.astype(np.int64) + 3) % 7
+        codigos_disc, disciplinas = pd.factorize(indice.disciplinas)
+
+        self.dados = pd.DataFrame({
+            "id": slots,
+            "Dia": (datas - self.inicio).astype(np.int32),
+            "Dia da Semana": pd.Categorical.from_codes(dia_semana.astype(np.int8), DIAS_SEMANA),
+            "Disciplina": pd.Categorical.from_codes(codigos_disc[topico], disciplinas),
+            "Tipo": pd.Categorical.from_codes(eh_revisao.astype(np.int8), ["Estudo", "Revisão"]),
+            "Tempo": np.full(len(slots), HORAS_PADRAO, dtype=np.float32),
+        })
+
+    def __len__(self):
+        return len(self.dados)
+
+    def ids(self, chaves):
+        # Tabela de consulta: chave inteira -> id de 64 bits do progresso
+        chaves = np.asarray(chaves, dtype=np.int64)
+        plano = self.indice.montar(chaves)
+        textos = plano["Disciplina"].to_numpy(dtype=object) + "::" + plano["Assunto"].to_numpy(dtype=object)
+        return ids_itens(textos)
+
+    def todos_ids(self):
+        if getattr(self, "_ids", None) is None:
+            self._ids = self.ids(self.dados["id"].to_numpy())
+        return self._ids
+
+class EstatisticasProgresso:
+    # Contadores de itens concluídos (geral, por Disciplina e por Tipo).
+    # Reconciliados com o cronograma uma vez por montagem, com um isin
+    # vetorizado; depois cada toggle só ajusta os contadores em O(1). Ids que
+    # não estão no cronograma atual (edital antigo) não entram na conta.
+    def __init__(self, compacto):
+        dados = compacto.dados
+        self.disciplinas = list(dados["Disciplina"].cat.categories)
+        self.tipos = list(dados["Tipo"].cat.categories)
+        self.ids = compacto.todos_ids()
+        self.cod_disciplina = dados["Disciplina"].cat.codes.to_numpy()
+        self.cod_tipo = dados["Tipo"].cat.codes.to_numpy()
+        self._indexar()
+
+    def acrescentar(self, ids, disciplinas, tipo="Revisão"):
+        # Itens que o cronograma compacto não tem (ex.: revisões espaçadas)
+        codigos = {d: i for i, d in enumerate(self.disciplinas)}
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.cod_disciplina = np.concatenate([
+            self.cod_disciplina,
+            np.array([codigos[d] for d in disciplinas], dtype=self.cod_disciplina.dtype),
+        ])
+        self.cod_tipo = np.concatenate([
+            self.cod_tipo, np.full(len(ids), self.tipos.index(tipo), dtype=self.cod_tipo.dtype),
+        ])
+        self._indexar()
+
+    def _indexar(self):
+        self.total = len(self.ids)
+        self.total_disciplina = np.bincount(self.cod_disciplina, minlength=len(self.disciplinas))
+        self.total_tipo = np.bincount(self.cod_tipo, minlength=len(self.tipos))
+
+        # id -> (disciplina, tipo, quantas linhas do plano têm esse id)
+        contagem = pd.DataFrame({
+            "id": self.ids, "d": self.cod_disciplina, "t": self.cod_tipo,
+        }).value_counts(sort=False)
+        self._itens = {
+            int(id_key): (int(d), int(t), int(n)) for (id_key, d, t), n in contagem.items()
+        }
+        self.reconciliar({})
+
+    def reconciliar(self, progresso):
+        feito = np.isin(self.ids, np.fromiter(progresso, dtype=np.int64, count=len(progresso)))
+        self.feitos = int(feito.sum())
+        self.feitos_disciplina = np.bincount(
+            self.cod_disciplina[feito], minlength=len(self.disciplinas)
+        )
+        self.feitos_tipo = np.bincount(self.cod_tipo[feito], minlength=len(self.tipos))
+
+    def marcar(self, id_key, concluido):
+        item = self._itens.get(id_key)
+        if item is None:
+            return
+        d, t, n = item
+        delta = n if concluido else -n
+        self.feitos += delta
+        self.feitos_disciplina[d] += delta
+        self.feitos_tipo[t] += delta
+
+    @property
+    def porcentagem(self):
+        return (self.feitos / self.total * 100) if self.total > 0 else 0
+
+    def por_disciplina(self):
+        return pd.DataFrame({
+            "Disciplina": self.disciplinas,
+            "Itens": self.total_disciplina,
+            "Concluídos": self.feitos_disciplina,
+            "% Concluído": np.round(self.feitos_disciplina / np.maximum(self.total_disciplina, 1) * 100, 1),
+        })
+
+    def por_tipo(self):
+        return pd.DataFrame({
+            "Tipo": self.tipos,
+            "Itens": self.total_tipo,
+            "Concluídos": self.feitos_tipo,
+        })
+
+def gerar_cronograma_compacto(df, col_disciplina, col_assunto, col_carga, data_inicio):
+    indice = IndiceAssuntos(df, col_disciplina, col_assunto, col_carga)
+    return CronogramaCompacto(indice, data_inicio)
+
+class VisaoCronograma:
+    # Acesso O(1) por semana: calcula só os 6 slots exibidos a partir do
+    # índice de assuntos, sem materializar o cronograma completo.
+    def __init__(self, indice, data_inicio, itens_por_semana=6):
+        self.indice = indice
+        self.data_inicio = data_inicio
+        self.itens_por_semana = itens_por_semana
+
+    @property
+    def total_itens(self):
+        return self.indice.total
+
+    @property
+    def total_semanas(self):
+        return max(math.ceil(self.total_itens / self.itens_por_semana), 1)
+
+    def fatia(self, inicio, fim):
+        slots = np.arange(max(inicio, 0), min(fim, self.total_itens))
+        plano = self.indice.montar(slots)
+        return montar_cronograma(plano, datas_dos_slots(self.data_inicio, slots))
+
+    def semana(self, numero):
+        inicio = (numero - 1) * self.itens_por_semana
+        return self.fatia(inicio, inicio + self.itens_por_semana)
+
+def duracoes_slots(indice):
+    # Horas de cada slot do plano: Partes e Revisão valem HORAS_PADRAO, a
+    # Parte final vale a fração decimal da carga do assunto
+    topico = np.repeat(np.arange(len(indice.n_linhas)), indice.n_linhas)
+    pos = np.arange(indice.total) - indice.inicio[topico]
+    eh_final = indice.tem_final[topico] & (pos == indice.n_partes[topico])
+    duracoes = np.full(indice.total, HORAS_PADRAO)
+    duracoes[eh_final] = indice.carga_decimal[topico[eh_final]]
+    return duracoes
+
+def empacotar_dias(duracoes, orcamento, dia_semana_inicial):
+    # Next-fit na ordem do plano: enche o dia até o orçamento daquele dia da
+    # semana; o item que não cabe no que sobrou vai para o próximo dia cujo
+    # orçamento comporta o item inteiro (dias com menos horas são pulados). Um
+    # item maior que o maior orçamento da semana ocupa sozinho o próximo dia
+    # com horas. O(n), ~0,1 s para 10^5 Partes.
+    # Devolve o offset (em dias desde o início) de cada slot.
+    orcamento = [float(h) for h in orcamento]
+    if len(orcamento) != 7 or max(orcamento) <= 0:
+        raise ValueError("O orçamento precisa de 7 dias (Seg..Dom) com ao menos um dia > 0h")
+    maior = max(orcamento)
+    dias = np.empty(len(duracoes), dtype=np.int32)
+    dia, livre = -1, -1.0  # antes do primeiro dia: o primeiro item sempre abre um dia
+    for k, horas in enumerate(duracoes.tolist()):
+        if horas > livre + 1e-9:
+            precisa = min(horas, maior) - 1e-9  # tolerância de ponto flutuante
+            dia += 1
+            while orcamento[(dia_semana_inicial + dia) % 7] <= max(precisa, 0.0):
+                dia += 1
+            livre = orcamento[(dia_semana_inicial + dia) % 7]
+        dias[k] = dia
+        livre -= horas
+    return dias
+
+def semanas_calendario(dias, dia_semana_inicial):
+    # Semanas Seg–Dom numeradas a partir da semana do primeiro dia de estudo,
+    # para um início no domingo não deixar a semana 1 vazia
+    semanas = (dias + dia_semana_inicial) // 7
+    return semanas - semanas[0] if len(semanas) else semanas
+
+def formatar_horas(duracoes):
+    return np.array([f"{h:g}h Estudo" for h in np.round(duracoes, 1)], dtype=object)
+
+class VisaoOrcamento(VisaoCronograma):
+    # Mesma interface da VisaoCronograma, mas os slots são empacotados em dias
+    # conforme um orçamento de horas por dia da semana (ex.: Seg–Sex 3h, Sáb 6h).
+    # Os ids não mudam, então o progresso continua valendo. As semanas são
+    # semanas de calendário (Seg–Dom) e podem ter mais de 6 itens.
+    def __init__(self, indice, data_inicio, orcamento=ORCAMENTO_PADRAO):
+        super().__init__(indice, data_inicio)
+        self.inicio = np.datetime64(pd.Timestamp(data_inicio).date(), "D")
+        dia_semana_inicial = pd.Timestamp(data_inicio).weekday()
+        self.duracoes = duracoes_slots(indice)
+        self.dias = empacotar_dias(self.duracoes, orcamento, dia_semana_inicial)
+        self.semanas = semanas_calendario(self.dias, dia_semana_inicial)
+
+    @property
+    def total_semanas(self):
+        return int(self.semanas[-1]) + 1 if len(self.semanas) else 1
+
+    def fatia(self, inicio, fim):
+        slots = np.arange(max(inicio, 0), min(fim, self.total_itens))
+        plano = self.indice.montar(slots)
+        datas = self.inicio + self.dias[slots]
+        return montar_cronograma(plano, datas, formatar_horas(self.duracoes[slots]))
+
+    def semana(self, numero):
+        inicio, fim = np.searchsorted(self.semanas, [numero - 1, numero])
+        return self.fatia(int(inicio), int(fim))
+
+class VisaoRevisoes(VisaoOrcamento):
+    # Revisões espaçadas: em vez de uma Revisão logo após a última Parte, cada
+    # assunto ganha uma revisão em cada intervalo (D+1, D+7, D+30...) contado a
+    # partir do dia em que foi concluído. A simulação anda dia a dia com um
+    # heap de revisões pendentes por data de vencimento: em cada dia de estudo
+    # as vencidas vêm primeiro e o resto da capacidade recebe estudo novo, o
+    # que dá O(n log n) para o plano inteiro.
+    #
+    # A cada DIAS_CHECKPOINT dias o estado (dia, posição no estudo, heap) é
+    # guardado; quando a conclusão de um assunto muda, só é replanejado o
+    # trecho a partir do checkpoint anterior ao dia em que ele foi estudado.
+    # A primeira revisão mantém o rótulo "Revisão {assunto}" (mesmo id de antes).
+    def __init__(self, indice, data_inicio, intervalos=INTERVALOS_REVISAO, itens_por_dia=1):
+        VisaoCronograma.__init__(self, indice, data_inicio)
+        self.inicio = np.datetime64(pd.Timestamp(data_inicio).date(), "D")
+        self.dia_semana_inicial = pd.Timestamp(data_inicio).weekday()
+        self.intervalos = tuple(sorted(int(i) for i in intervalos))
+        self.itens_por_dia = itens_por_dia
+        self.conclusoes = {}  # assunto -> dia (offset) em que a última Parte foi marcada
+
+        # Fila de estudo: todas as Partes; a Revisão única só fica para assuntos sem Partes
+        topico = np.repeat(np.arange(len(indice.n_linhas)), indice.n_linhas)
+        pos = np.arange(indice.total) - indice.inicio[topico]
+        n_estudo = indice.n_linhas - 1
+        sem_estudo = n_estudo[topico] == 0
+        manter = (pos < n_estudo[topico]) | sem_estudo
+        self.estudo_topico = topico[manter].tolist()
+        self.estudo_pos = pos[manter].tolist()
+        ultimo = (pos == n_estudo[topico] - 1) & ~sem_estudo
+        self.estudo_ultimo = ultimo[manter].tolist()
+        self.duracoes = duracoes_slots(indice)
+
+        # id da última Parte de cada assunto -> assunto (para concluir())
+        slots_ultimos = (indice.inicio + n_estudo - 1)[n_estudo > 0]
+        ultimos = indice.montar(slots_ultimos)
+        ids = ids_itens(ultimos["Disciplina"].to_numpy(dtype=object) + "::" + ultimos["Assunto"].to_numpy(dtype=object))
+        self.topico_do_ultimo = dict(zip(ids.tolist(), np.flatnonzero(n_estudo > 0).tolist()))
+        self.dia_estudado = {}
+
+        self._checkpoints = [(0, 0, [], 0, 0)]  # (dia, próximo estudo, heap, saídas, seq)
+        self._topicos, self._pos, self._dias = [], [], []
+        self.planejar(0)
+
+    @property
+    def total_itens(self):
+        return len(self.dias)
+
+    def planejar(self, a_partir=0):
+        # Retoma do último checkpoint até `a_partir` e simula o resto do plano
+        dias_cp = [c[0] for c in self._checkpoints]
+        i = max(bisect.bisect_right(dias_cp, a_partir) - 1, 0)
+        del self._checkpoints[i + 1:]
+        dia, prox, heap, n_saida, seq = self._checkpoints[i]
+        heap = list(heap)
+        del self._topicos[n_saida:], self._pos[n_saida:], self._dias[n_saida:]
+
+        n_estudo = len(self.estudo_topico)
+        while prox < n_estudo or heap:
+            if SEMANA_ESTUDO[(self.dia_semana_inicial + dia) % 7] == "0":
+                dia += 1
+                continue
+            if prox >= n_estudo and heap[0][0] > dia:
+                dia = heap[0][0]  # só restam revisões: pula direto para a próxima
+                continue
+            if dia - self._checkpoints[-1][0] >= DIAS_CHECKPOINT:
+                self._checkpoints.append((dia, prox, list(heap), len(self._dias), seq))
+
+            capacidade = self.itens_por_dia
+            while capacidade and heap and heap[0][0] <= dia:
+                _, _, t, k = heapq.heappop(heap)
+                self._emitir(t, -1 - k, dia)
+                capacidade -= 1
+            while capacidade and prox < n_estudo:
+                t = self.estudo_topico[prox]
+                self._emitir(t, self.estudo_pos[prox], dia)
+                if self.estudo_ultimo[prox]:
+                    self.dia_estudado[t] = dia
+                    ancora = self.conclusoes.get(t, dia)
+                    for k, intervalo in enumerate(self.intervalos):
+                        heapq.heappush(heap, (ancora + intervalo, seq, t, k))
+                        seq += 1
+                prox += 1
+                capacidade -= 1
+            dia += 1
+
+        self.topicos = np.array(self._topicos, dtype=np.int64)
+        self.pos = np.array(self._pos, dtype=np.int64)
+        self.dias = np.array(self._dias, dtype=np.int64)
+        self.semanas = semanas_calendario(self.dias, self.dia_semana_inicial)
+
+    def _emitir(self, topico, pos, dia):
+        self._topicos.append(topico)
+        self._pos.append(pos)
+        self._dias.append(dia)
+
+    def _dia(self, data):
+        return int((np.datetime64(data, "D") - self.inicio).astype(int))
+
+    def aplicar_conclusoes(self, datas):
+        # Conclusões gravadas (id da última Parte -> data) de uma vez, num só replanejamento
+        for id_key, data in datas.items():
+            t = self.topico_do_ultimo.get(id_key)
+            if t is not None:
+                self.conclusoes[t] = self._dia(data)
+        self.planejar(0)
+
+    def revisoes_extras(self):
+        # Ids e disciplinas das revisões além da primeira (que já existe no
+        # plano original), para as estatísticas contarem o plano inteiro
+        com_estudo = np.flatnonzero(self.indice.n_linhas > 1)
+        ids, disciplinas = [], []
+        for k in range(1, len(self.intervalos)):
+            for t in com_estudo.tolist():
+                disciplina = self.indice.disciplinas[t]
+                ids.append(id_item(f"{disciplina}::{self._rotulo_revisao(t, k)}"))
+                disciplinas.append(disciplina)
+        return ids, disciplinas
+
+    def _rotulo_revisao(self, topico, k):
+        if k == 0:
+            return f"Revisão {self.indice.assuntos[topico]}"
+        return f"Revisão {k + 1} (D+{self.intervalos[k]}) {self.indice.assuntos[topico]}"
+
+    def concluir(self, id_key, data=None):
+        # Marca (ou desmarca, com data None) a conclusão da última Parte de um
+        # assunto; as revisões dele passam a contar a partir desse dia
+        t = self.topico_do_ultimo.get(id_key)
+        if t is None:
+            return False
+        dia = None if data is None else self._dia(data)
+        if self.conclusoes.get(t) == dia:
+            return False
+        if dia is None:
+            self.conclusoes.pop(t, None)
+        else:
+            self.conclusoes[t] = dia
+        self.planejar(self.dia_estudado.get(t, 0))
+        return True
+
+    def fatia(self, inicio, fim):
+        linhas = slice(max(inicio, 0), min(fim, self.total_itens))
+        topico, pos = self.topicos[linhas], self.pos[linhas]
+        estudo = pos >= 0
+        disciplinas = self.indice.disciplinas[topico]
+        assuntos = np.empty(len(topico), dtype=object)
+        tipos = np.full(len(topico), "Revisão", dtype=object)
+        if estudo.any():
+            partes = self.indice.montar(self.indice.inicio[topico[estudo]] + pos[estudo])
+            assuntos[estudo] = partes["Assunto"].to_numpy(dtype=object)
+            tipos[estudo] = partes["Tipo"].to_numpy(dtype=object)
+        revisoes = np.flatnonzero(~estudo)
+        assuntos[revisoes] = [
+            self._rotulo_revisao(t, k) for t, k in zip(topico[revisoes], -1 - pos[revisoes])
+        ]
+        plano = pd.DataFrame({"Disciplina": disciplinas, "Assunto": assuntos, "Tipo": tipos})
+        if self.indice.concursos is not None:
+            plano[COL_CONCURSOS] = self.indice.concursos[topico]
+        duracoes = np.full(len(topico), HORAS_PADRAO)
+        duracoes[estudo] = self.duracoes[self.indice.inicio[topico[estudo]] + pos[estudo]]
+        return montar_cronograma(plano, self.inicio + self.dias[linhas], formatar_horas(duracoes))
+
+def ordem_intercalada(indice, pesos=None):
+    # Permutação dos slots do índice que intercala as disciplinas: o k-ésimo
+    # item de uma disciplina de peso p recebe a chave k/p e o plano segue as
+    # chaves em ordem (empate: ordem alfabética da disciplina). É exatamente a
+    # ordem de mesclar_fluxos, só que calculada de uma vez com lexsort.
+    pesos = pesos or {}
+    topico = np.repeat(np.arange(len(indice.n_linhas)), indice.n_linhas)
+    nomes, disc = np.unique(indice.disciplinas[topico], return_inverse=True)
+    peso = np.array([float(pesos.get(n, 1.0)) for n in nomes])
+    if (peso <= 0).any():
+        raise ValueError("Os pesos das disciplinas precisam ser maiores que zero")
+    # O índice já vem ordenado por disciplina: cada uma é um trecho contíguo
+    primeiro = np.flatnonzero(np.r_[True, disc[1:] != disc[:-1]])
+    k = np.arange(indice.total) - primeiro[disc]
+    return np.lexsort((disc, k / peso[disc]))
+
+class VisaoIntercalada(VisaoCronograma):
+    # Um item por dia como a VisaoCronograma, mas alternando as disciplinas
+    # (round-robin, ou proporcional aos pesos) em vez de estudar uma inteira
+    # antes da próxima. Os ids não mudam, então o progresso continua valendo.
+    def __init__(self, indice, data_inicio, pesos=None):
+        super().__init__(indice, data_inicio)
+        self.ordem = ordem_intercalada(indice, pesos)
+
+    def fatia(self, inicio, fim):
+        posicoes = np.arange(max(inicio, 0), min(fim, self.total_itens))
+        plano = self.indice.montar(self.ordem[posicoes])
+        return montar_cronograma(plano, datas_dos_slots(self.data_inicio, posicoes))
+
+def formatar_datas(df):
+    # A coluna Data fica como datetime64; o texto só é gerado para exibir/exportar
+    df = df.copy()
+    df["Data"] = df["Data"].dt.strftime(FORMATO_DATA)
+    return df
+
+def escrever_atomico(caminho, conteudo):
+    # write-temp + fsync + rename: um crash no meio nunca deixa o arquivo pela metade
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=pasta)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def salvar_progresso(progresso, caminho=PROGRESS_FILE):
+    # Formato atual: lista JSON com os ids de 64 bits dos itens concluídos
+    escrever_atomico(caminho, json.dumps(sorted(progresso)))
+
+def migrar_progresso(dados):
+    # Formato antigo: {"Disciplina::Assunto": true}. Devolve (progresso, migrou)
+    if isinstance(dados, dict):
+        return {chave_progresso(k): True for k, v in dados.items() if v}, True
+    return {int(k): True for k in dados}, False
+
+def carregar_progresso(caminho=PROGRESS_FILE):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return migrar_progresso(json.load(f))[0]
+
+class DiarioProgresso:
+    # Progresso em dois arquivos: um snapshot JSON (PROGRESS_FILE) e um diário
+    # append-only com uma linha por marcação. Cada toggle custa um append; quando
+    # o diário passa de LIMITE_DIARIO bytes ele é rotacionado e compactado num
+    # novo snapshot em segundo plano. O snapshot novo sai só do disco (snapshot
+    # antigo + diário rotacionado), nunca do estado de uma sessão: o arquivo é
+    # compartilhado por todas as sessões e pode estar à frente de qualquer uma.
+    def __init__(self, caminho=PROGRESS_FILE, limite=LIMITE_DIARIO):
+        self.caminho = caminho
+        self.caminho_diario = caminho + ".log"
+        self.caminho_rotacionado = caminho + ".log.1"
+        self.limite = limite
+        self.corrompido = None
+        self._lock = threading.Lock()
+        self._compactando = None
+
+    def carregar(self):
+        # Uma compactação em andamento apagaria o .log.1 depois de lido o snapshot antigo
+        self.aguardar()
+        with self._lock:
+            migrou = False
+            try:
+                if os.path.exists(self.caminho):
+                    with open(self.caminho, "r", encoding="utf-8") as f:
+                        progresso, migrou = migrar_progresso(json.load(f))
+                else:
+                    progresso = {}
+            except ValueError:
+                # Não descarta o arquivo em silêncio: guarda uma cópia para inspeção
+                self.corrompido = f"{self.caminho}.corrompido"
+                os.replace(self.caminho, self.corrompido)
+                progresso = {}
+            # O diário rotacionado (se uma compactação não terminou) vem antes do atual
+            for caminho in (self.caminho_rotacionado, self.caminho_diario):
+                migrou |= self._reaplicar(caminho, progresso)
+            if migrou:
+                # Migração única: regrava tudo já com ids de 64 bits e zera o diário
+                salvar_progresso(progresso, self.caminho)
+                for caminho in (self.caminho_rotacionado, self.caminho_diario):
+                    if os.path.exists(caminho):
+                        os.remove(caminho)
+            return progresso
+
+    def _reaplicar(self, caminho, progresso):
+        # Devolve True se o diário ainda tinha chaves no formato antigo
+        antigo = False
+        if not os.path.exists(caminho):
+            return antigo
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    # última linha truncada por um crash durante o append
+                    continue
+                antigo |= isinstance(registro["id"], str)
+                id_key = chave_progresso(registro["id"])
+                if registro["v"]:
+                    progresso[id_key] = True
+                else:
+                    progresso.pop(id_key, None)
+        return antigo
+
+    def registrar(self, id_key, concluido):
+        linha = json.dumps({"id": int(id_key), "v": bool(concluido)}) + "\n"
+        with self._lock:
+            with open(self.caminho_diario, "a", encoding="utf-8") as f:
+                f.write(linha)
+                tamanho = f.tell()
+            if tamanho >= self.limite:
+                self._rotacionar()
+
+    def _rotacionar(self):
+        # Só uma compactação por vez; as próximas esperam o diário crescer de novo
+        if self._compactando is not None and self._compactando.is_alive():
+            return
+        os.replace(self.caminho_diario, self.caminho_rotacionado)
+        self._compactando = threading.Thread(target=self._compactar, daemon=True)
+        self._compactando.start()
+
+    def _compactar(self):
+        # Com o lock: carregar() nunca vê o snapshot novo junto com o .log.1, nem
+        # o antigo sem ele. Um reset/migração pode ter apagado o .log.1 antes.
+        with self._lock:
+            if not os.path.exists(self.caminho_rotacionado):
+                return
+            snapshot = carregar_progresso(self.caminho)
+            self._reaplicar(self.caminho_rotacionado, snapshot)
+            salvar_progresso(snapshot, self.caminho)
+            os.remove(self.caminho_rotacionado)
+
+    def aguardar(self):
+        if self._compactando is not None:
+            self._compactando.join()
+
+    def resetar(self):
+        self.aguardar()
+        with self._lock:
+            for caminho in (self.caminho, self.caminho_diario, self.caminho_rotacionado):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+class DatasConclusao:
+    # Dia em que cada assunto foi concluído (id da última Parte -> data ISO),
+    # por (usuário, plano), para as revisões espaçadas de um reload saírem
+    # iguais às da sessão que marcou. Poucas escritas (uma por assunto), então
+    # o arquivo inteiro é regravado de forma atômica a cada mudança.
+    def __init__(self, caminho=CONCLUSOES_FILE):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._dados = None
+
+    def _todos(self):
+        if self._dados is None:
+            try:
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    self._dados = json.load(f)
+            except (OSError, ValueError):
+                self._dados = {}
+        return self._dados
+
+    def carregar(self, usuario, plano):
+        with self._lock:
+            datas = self._todos().get(f"{usuario}::{plano}", {})
+            return {int(k): date.fromisoformat(v) for k, v in datas.items()}
+
+    def registrar(self, id_key, data, usuario, plano):
+        with self._lock:
+            datas = self._todos().setdefault(f"{usuario}::{plano}", {})
+            if data is None:
+                datas.pop(str(id_key), None)
+            else:
+                datas[str(id_key)] = data.isoformat()
+            escrever_atomico(self.caminho, json.dumps(self._dados))
+
+    def resetar(self, usuario, plano):
+        with self._lock:
+            if self._todos().pop(f"{usuario}::{plano}", None) is not None:
+                escrever_atomico(self.caminho, json.dumps(self._dados))
+
+class ProgressoSQLite:
+    # Backend SQLite em modo WAL: uma linha por item concluído, com namespace
+    # por (usuário/perfil, plano). Várias sessões gravam em paralelo sem
+    # reescrever o progresso umas das outras. Os itens são os ids de 64 bits.
+    # Uma conexão por arquivo: o namespace vai em cada chamada (ou fica preso
+    # num PerfilProgresso), então perfis novos não abrem conexões novas.
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.corrompido = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS progresso_itens ("
+                " usuario TEXT NOT NULL,"
+                " plano TEXT NOT NULL,"
+                " item INTEGER NOT NULL,"
+                " PRIMARY KEY (usuario, plano, item)"
+                ") WITHOUT ROWID"
+            )
+
+    def carregar(self, usuario, plano):
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT item FROM progresso_itens WHERE usuario = ? AND plano = ?",
+                (usuario, plano),
+            ).fetchall()
+        return {item: True for (item,) in linhas}
+
+    def registrar(self, id_key, concluido, usuario, plano):
+        if concluido:
+            sql = "INSERT OR IGNORE INTO progresso_itens (usuario, plano, item) VALUES (?, ?, ?)"
+        else:
+            sql = "DELETE FROM progresso_itens WHERE usuario = ? AND plano = ? AND item = ?"
+        with self._lock, self._conn:
+            self._conn.execute(sql, (usuario, plano, int(id_key)))
+
+    def resetar(self, usuario, plano):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM progresso_itens WHERE usuario = ? AND plano = ?",
+                (usuario, plano),
+            )
+
+class PerfilProgresso:
+    # Um namespace (usuário, plano) de um backend compartilhado, com a mesma
+    # interface sem argumentos do DiarioProgresso. É barato criar um por rerun:
+    # dois perfis são iguais se apontam para o mesmo backend e namespace.
+    def __init__(self, backend, *namespace):
+        self.backend = backend
+        self.namespace = namespace
+
+    def __eq__(self, outro):
+        return (
+            isinstance(outro, PerfilProgresso)
+            and outro.backend is self.backend and outro.namespace == self.namespace
+        )
+
+    def __hash__(self):
+        return hash((id(self.backend), self.namespace))
+
+    @property
+    def corrompido(self):
+        return self.backend.corrompido
+
+    def carregar(self):
+        return self.backend.carregar(*self.namespace)
+
+    def registrar(self, id_key, concluido):
+        self.backend.registrar(id_key, concluido, *self.namespace)
+
+    def resetar(self):
+        self.backend.resetar(*self.namespace)
+
+class GravadorAssincrono:
+    # Write-behind opcional sobre qualquer backend de progresso: os toggles vão
+    # para uma fila limitada e uma única thread agrupa as marcações e grava no
+    # máximo a cada `intervalo_ms`. Fila cheia bloqueia quem marca (backpressure).
+    # O namespace opcional (usuário, plano) é repassado ao backend.
+    def __init__(self, backend, intervalo_ms=GRAVACAO_INTERVALO_MS, max_pendentes=GRAVACAO_MAX_PENDENTES):
+        self.backend = backend
+        self.intervalo = intervalo_ms / 1000
+        self.pendentes = 0
+        self.gravados = 0
+        self.erro = None
+        self._fila = queue.Queue(maxsize=max_pendentes)
+        self._agora = threading.Event()
+        self._contadores = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        # A thread é do processo, não da sessão: o que uma sessão enfileirou é
+        # gravado mesmo depois que a aba fecha. Só a saída do interpretador
+        # pode perder marcações, por isso o flush fica no atexit.
+        atexit.register(self.flush)
+
+    @property
+    def corrompido(self):
+        return self.backend.corrompido
+
+    def carregar(self, *namespace):
+        self.flush()
+        return self.backend.carregar(*namespace)
+
+    def registrar(self, id_key, concluido, *namespace):
+        with self._contadores:
+            self.pendentes += 1
+        self._fila.put(((namespace, id_key), concluido))
+
+    def resetar(self, *namespace):
+        self.flush()
+        self.backend.resetar(*namespace)
+
+    def flush(self):
+        # Acorda a thread e espera até tudo que já foi enfileirado estar gravado
+        self._agora.set()
+        self._fila.join()
+
+    def _loop(self):
+        while True:
+            lote = [self._fila.get()]
+            self._agora.wait(self.intervalo)
+            self._agora.clear()
+            while True:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            # Só a última marcação de cada item importa. Cada registro é só
+            # (id, valor), então a ordem entre itens diferentes é irrelevante
+            ultimos = dict(lote)
+            try:
+                for (namespace, id_key), concluido in ultimos.items():
+                    self.backend.registrar(id_key, concluido, *namespace)
+            except Exception as e:
+                # A thread não pode morrer: flush() ficaria esperando para sempre
+                self.erro = e
+            finally:
+                with self._contadores:
+                    self.pendentes -= len(lote)
+                    self.gravados += len(ultimos)
+                for _ in lote:
+                    self._fila.task_done()
+
+# --- Pipeline em streaming ---
+# Cada estágio recebe um iterável e devolve um gerador, então nada é
+# materializado: linhas do edital -> tópicos -> Partes/Revisões -> slots
+# datados -> qualquer consumidor (exportador, contagem). O pico de
+# memória não depende do tamanho do edital. Novos estágios (ordenação,
+# intercalação, filtros) são só mais funções no encadeamento:
+#
+#   slots = pipeline(linhas_edital(arq, COLS), topicos, expandir, partial(datar, data_inicio=d))
+
+Topico = namedtuple("Topico", "disciplina assunto carga")
+Item = namedtuple("Item", "disciplina assunto tipo")
+Slot = namedtuple("Slot", "id data dia_semana disciplina assunto tipo tempo")
+
+def pipeline(fonte, *estagios):
+    fluxo = fonte
+    for estagio in estagios:
+        fluxo = estagio(fluxo)
+    return fluxo
+
+def topicos(linhas):
+    # (Disciplina, Assunto, Estudo (h)) -> Topico, ignorando linhas sem disciplina
+    for disciplina, assunto, carga in linhas:
+        if disciplina is None or (isinstance(disciplina, float) and math.isnan(disciplina)):
+            continue
+        if carga is None or (isinstance(carga, float) and math.isnan(carga)):
+            raise ValueError(f"Assunto '{assunto}' sem carga horária")
+        yield Topico(disciplina, str(assunto), float(carga))
+
+def ordenar_por_disciplina(fluxo):
+    # Mesma ordem do groupby do app (disciplinas ordenadas, assuntos na ordem
+    # do arquivo). Precisa guardar os tópicos: memória O(assuntos), não O(slots).
+    yield from sorted(fluxo, key=lambda t: t.disciplina)
+
+def expandir(fluxo):
+    # Topico -> Partes, Parte final fracionária e Revisão, um Item por vez
+    for t in fluxo:
+        carga_int = math.trunc(t.carga)
+        carga_decimal = t.carga - carga_int
+        for i in range(max(carga_int, 0)):
+            yield Item(t.disciplina, f"{t.assunto} - Parte {i + 1}", "Estudo")
+        if carga_decimal > 0:
+            yield Item(t.disciplina, f"{t.assunto} - Parte final ({carga_decimal:.1f}h)", "Estudo")
+        yield Item(t.disciplina, f"Revisão {t.assunto}", "Revisão")
+
+_FIM = object()
+
+def mesclar_fluxos(fluxos, pesos=None):
+    # Merge k-way ponderado com heap: o k-ésimo item do fluxo i tem chave
+    # k/pesos[i] e sai sempre o de menor chave (empate: menor i). Com pesos
+    # iguais é um round-robin; com peso 2 um fluxo sai duas vezes mais. Só
+    # guarda o próximo item de cada fluxo, O(log k) por item.
+    fluxos = list(fluxos)
+    pesos = [1.0] * len(fluxos) if pesos is None else [float(p) for p in pesos]
+    if any(p <= 0 for p in pesos):
+        raise ValueError("Os pesos das disciplinas precisam ser maiores que zero")
+    heap = []
+    for i, fluxo in enumerate(fluxos):
+        fluxo = iter(fluxo)
+        item = next(fluxo, _FIM)
+        if item is not _FIM:
+            heap.append((0.0, i, item, fluxo))
+    heapq.heapify(heap)
+    emitidos = [0] * len(fluxos)
+    while heap:
+        _, i, item, fluxo = heap[0]
+        yield item
+        emitidos[i] += 1
+        proximo = next(fluxo, _FIM)
+        if proximo is _FIM:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (emitidos[i] / pesos[i], i, proximo, fluxo))
+
+def intercalar_disciplinas(fluxo, pesos=None):
+    # Topico -> Item, alternando as disciplinas em vez de uma inteira por vez.
+    # Agrupa os tópicos por disciplina (memória O(assuntos), como
+    # ordenar_por_disciplina) e expande cada grupo sob demanda no merge.
+    # `pesos` é um dict disciplina -> peso; as ausentes valem 1.
+    grupos = {}
+    for t in fluxo:
+        grupos.setdefault(t.disciplina, []).append(t)
+    nomes = sorted(grupos)
+    pesos = pesos or {}
+    yield from mesclar_fluxos(
+        [expandir(grupos[n]) for n in nomes], [pesos.get(n, 1.0) for n in nomes]
+    )
+
+def datar(fluxo, data_inicio):
+    # Um Item por dia de estudo (Seg–Sáb), com o mesmo id de 64 bits do app
+    dia = pd.Timestamp(data_inicio).date()
+    for item in fluxo:
+        while dia.weekday() == 6:
+            dia += timedelta(days=1)
+        yield Slot(
+            id_item(f"{item.disciplina}::{item.assunto}"), dia, DIAS_SEMANA[dia.weekday()],
+            item.disciplina, item.assunto, item.tipo, TEMPO_PADRAO,
+        )
+        dia += timedelta(days=1)
+
+def em_lotes(fluxo, tamanho=LINHAS_POR_LOTE):
+    # Consumidor genérico: DataFrames de até `tamanho` slots, com as colunas do app
+    fluxo = iter(fluxo)
+    while True:
+        bloco = list(islice(fluxo, tamanho))
+        if not bloco:
+            return
+        lote = pd.DataFrame(bloco, columns=Slot._fields)
+        lote["data"] = pd.to_datetime(lote["data"])
+        yield lote.rename(columns={
+            "data": "Data", "dia_semana": "Dia da Semana", "disciplina": "Disciplina",
+            "assunto": "Assunto", "tipo": "Tipo", "tempo": "Tempo",
+        })
+
+
+
+def _lotes_visao(visao, tamanho):
+    for inicio in range(0, visao.total_itens, tamanho):
+        yield visao.fatia(inicio, inicio + tamanho)
+
+def lotes_cronograma(fonte, progresso, tamanho=LINHAS_POR_LOTE, formatar=True):
+    # Gera o cronograma em fatias de `tamanho` linhas, já com "Já Estudada"
+    # (e datas formatadas, se `formatar`), sem nunca montar o plano inteiro.
+    # `fonte` é uma VisaoCronograma ou um fluxo de Slots do pipeline.
+    concluidos = list(progresso)
+    if isinstance(fonte, VisaoCronograma):
+        lotes = _lotes_visao(fonte, tamanho)
+    else:
+        lotes = em_lotes(fonte, tamanho)
+    for lote in lotes:
+        lote["Já Estudada"] = np.where(lote["id"].isin(concluidos), "Sim", "Não")
+        colunas = COLUNAS_EXPORT + [COL_CONCURSOS] if COL_CONCURSOS in lote else COLUNAS_EXPORT
+        if not formatar:
+            yield lote[colunas]
+            continue
+        # Texto: o Excel guarda números como double e perderia bits do id
+        lote["id"] = lote["id"].astype(str)
+        yield formatar_datas(lote)[colunas]
+
+def nome_aba(nome, usados):
+    # Excel: no máximo 31 caracteres, sem []:*?/\ e sem nomes repetidos
+    base = re.sub(r"[\[\]:*?/\\]", "-", str(nome)).strip("'")[:31] or "Sem nome"
+    candidato, n = base, 1
+    while candidato.lower() in usados:
+        n += 1
+        sufixo = f" ({n})"
+        candidato = base[:31 - len(sufixo)] + sufixo
+    usados.add(candidato.lower())
+    return candidato
+
+class AbaExcel:
+    # Aba write-only que continua em "Nome (2)", "Nome (3)"... ao chegar no
+    # limite de linhas do Excel, repetindo o cabeçalho. O modo write-only não
+    # valida o limite e geraria um arquivo que o Excel não abre.
+    def __init__(self, wb, nome, usados, cabecalho, max_linhas=MAX_LINHAS_EXCEL):
+        self.wb = wb
+        self.nome = nome
+        self.usados = usados
+        self.cabecalho = cabecalho
+        self.max_linhas = max_linhas
+        self.partes = 0
+        self._nova_aba()
+
+    def _nova_aba(self):
+        self.partes += 1
+        nome = self.nome if self.partes == 1 else f"{str(self.nome)[:25]} ({self.partes})"
+        self.aba = self.wb.create_sheet(nome_aba(nome, self.usados))
+        self.aba.append(self.cabecalho)
+        self.linhas = 1
+
+    def append(self, linha):
+        if self.linhas >= self.max_linhas:
+            self._nova_aba()
+        self.aba.append(linha)
+        self.linhas += 1
+
+def exportar_excel(visao, progresso, destino=None, por_disciplina=False):
+    # Workbook em modo write-only: cada linha vai direto para o XML da aba e
+    # não fica em memória como objeto Cell. O pico de memória é limitado a um
+    # lote de LINHAS_POR_LOTE linhas (alguns MB) mais o buffer do zip,
+    # independente do tamanho do plano. `destino` pode ser um caminho ou um
+    # arquivo; sem ele, os bytes do .xlsx são devolvidos. Planos acima do
+    # limite de linhas do Excel continuam em abas "Cronograma (2)"...
+    wb = openpyxl.Workbook(write_only=True)
+    usados = set()
+    contagem = {}
+    if por_disciplina:
+        resumo = wb.create_sheet(nome_aba("Resumo", usados))
+        abas = {}
+    else:
+        resumo = None
+        unica = None
+
+    for lote in lotes_cronograma(visao, progresso):
+        if not por_disciplina:
+            if unica is None:
+                unica = AbaExcel(wb, "Cronograma", usados, list(lote.columns))
+            for linha in lote.itertuples(index=False, name=None):
+                unica.append(linha)
+            continue
+        # groupby(sort=False) mantém a ordem do plano dentro de cada disciplina
+        for disciplina, grupo in lote.groupby("Disciplina", sort=False):
+            aba = abas.get(disciplina)
+            if aba is None:
+                aba = abas[disciplina] = AbaExcel(wb, disciplina, usados, list(grupo.columns))
+            for linha in grupo.itertuples(index=False, name=None):
+                aba.append(linha)
+            total, feitos = contagem.get(disciplina, (0, 0))
+            contagem[disciplina] = (
+                total + len(grupo),
+                feitos + int((grupo["Já Estudada"] == "Sim").sum()),
+            )
+
+    if not por_disciplina and unica is None:
+        AbaExcel(wb, "Cronograma", usados, COLUNAS_EXPORT)
+
+    if resumo is not None:
+        resumo.append(["Disciplina", "Itens", "Concluídos", "% Concluído"])
+        geral_total = geral_feitos = 0
+        for disciplina, (total, feitos) in contagem.items():
+            resumo.append([disciplina, total, feitos, round(feitos / total * 100, 1)])
+            geral_total += total
+            geral_feitos += feitos
+        percentual = round(geral_feitos / geral_total * 100, 1) if geral_total else 0.0
+        resumo.append(["Total", geral_total, geral_feitos, percentual])
+
+    if destino is not None:
+        wb.save(destino)
+        return destino
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+def exportar_texto(escrever, visao, progresso, destino):
+    # Exportadores de texto: sem destino devolvem bytes UTF-8; com um caminho
+    # abrem o arquivo; com um arquivo aberto escrevem nele lote a lote.
+    if destino is None:
+        buffer = io.StringIO()
+        escrever(visao, progresso, buffer)
+        return buffer.getvalue().encode("utf-8")
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "w", encoding="utf-8", newline="") as f:
+            escrever(visao, progresso, f)
+        return destino
+    escrever(visao, progresso, destino)
+    return destino
+
+def _escrever_csv(visao, progresso, f):
+    cabecalho = True
+    for lote in lotes_cronograma(visao, progresso):
+        lote.to_csv(f, index=False, header=cabecalho)
+        cabecalho = False
+    if cabecalho:
+        f.write(",".join(COLUNAS_EXPORT) + "\n")
+
+def exportar_csv(visao, progresso, destino=None):
+    # CSV em pedaços: um lote de LINHAS_POR_LOTE linhas por vez em memória
+    return exportar_texto(_escrever_csv, visao, progresso, destino)
+
+def exportar_parquet(visao, progresso, destino=None):
+    # Um row group por lote; Data sai como data de verdade, não texto
+    if pq is None:
+        raise RuntimeError("Exportar Parquet requer o pacote pyarrow")
+    saida = io.BytesIO() if destino is None else destino
+    escritor = None
+    try:
+        for lote in lotes_cronograma(visao, progresso, formatar=False):
+            lote = lote.assign(Data=lote["Data"].dt.date)
+            tabela = pa.Table.from_pandas(lote, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(saida, tabela.schema)
+            escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return saida.getvalue() if destino is None else destino
+
+def escapar_ics(texto):
+    return (
+        str(texto).replace("\\", "\\\\").replace(";", "\\;")
+        .replace(",", "\\,").replace("\n", "\\n")
+    )
+
+def dobrar_ics(linha):
+    # RFC 5545: linhas de no máximo 75 octetos, continuação começa com espaço
+    dados = linha.encode("utf-8")
+    if len(dados) <= 75:
+        return linha + "\r\n"
+    partes, atual = [], ""
+    for c in linha:
+        limite = 75 if not partes else 74
+        if len((atual + c).encode("utf-8")) > limite:
+            partes.append(atual)
+            atual = ""
+        atual += c
+    partes.append(atual)
+    return "\r\n ".join(partes) + "\r\n"
+
+def _escrever_ics(visao, progresso, f):
+    agora = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+    f.write(dobrar_ics(f"PRODID:-//Cronograma de Estudos//{CONCURSO}//PT"))
+    for lote in lotes_cronograma(visao, progresso, formatar=False):
+        inicio = lote["Data"].dt.strftime("%Y%m%d")
+        fim = (lote["Data"] + pd.Timedelta(days=1)).dt.strftime("%Y%m%d")
+        for item, dia, dia_fim, disciplina, assunto, tipo, tempo, estudada in zip(
+            lote["id"], inicio, fim, lote["Disciplina"], lote["Assunto"],
+            lote["Tipo"], lote["Tempo"], lote["Já Estudada"],
+        ):
+            # UID derivado do id do item: reimportar atualiza o mesmo evento
+            uid = f"{item:016x}"
+            f.write("BEGIN:VEVENT\r\n")
+            f.write(f"UID:{uid}@cronograma-estudos\r\n")
+            f.write(f"DTSTAMP:{agora}\r\n")
+            f.write(f"DTSTART;VALUE=DATE:{dia}\r\n")
+            f.write(f"DTEND;VALUE=DATE:{dia_fim}\r\n")
+            f.write(dobrar_ics(f"SUMMARY:{escapar_ics(assunto)}"))
+            f.write(dobrar_ics(f"DESCRIPTION:{escapar_ics(f'{disciplina} - {tipo} - {tempo}')}"))
+            f.write(dobrar_ics(f"CATEGORIES:{escapar_ics(disciplina)}"))
+            if estudada == "Sim":
+                f.write("STATUS:CONFIRMED\r\n")
+            f.write("END:VEVENT\r\n")
+    f.write("END:VCALENDAR\r\n")
+
+def exportar_ics(visao, progresso, destino=None):
+    # iCalendar: um VEVENT de dia inteiro por slot de estudo
+    return exportar_texto(_escrever_ics, visao, progresso, destino)
+
+# rótulo -> (exportador, nome do arquivo, mime)
+FORMATOS_EXPORT = {
+    "Excel": (exportar_excel, "Cronograma_Estudos.xlsx",
+              "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": (exportar_csv, "Cronograma_Estudos.csv", "text/csv"),
+    "iCalendar": (exportar_ics, "Cronograma_Estudos.ics", "text/calendar"),
+}
+if pq is not None:
+    FORMATOS_EXPORT["Parquet"] = (
+        exportar_parquet, "Cronograma_Estudos.parquet", "application/vnd.apache.parquet"
+    )
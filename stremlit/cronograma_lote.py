@@ -0,0 +1,117 @@
+# Geração em lote: um cronograma por edital de um diretório, em paralelo.
+#
+#   python stremlit/cronograma_lote.py Edital_Verticalizado --inicio 2025-10-20 --formato CSV
+#
+# Cada arquivo .xlsx vira um processo do pool (o trabalho é CPU-bound, então
+# o ganho escala com o número de núcleos). Ao final imprime o tempo e o erro,
+# se houver, de cada edital.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from functools import partial
+
+from cronograma_core import (
+    FORMATOS_EXPORT, IndiceAssuntos, VisaoCronograma, VisaoIntercalada, load_data,
+    pipeline, linhas_edital, topicos, ordenar_por_disciplina, expandir, intercalar_disciplinas, datar,
+)
+
+COL_DISCIPLINA = "Disciplina"
+COL_ASSUNTO = "Assunto"
+COL_CARGA = "Estudo (h)"
+
+
+class Contador:
+    # Estágio de passagem que só conta os slots que atravessam o pipeline
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, fluxo):
+        for slot in fluxo:
+            self.total += 1
+            yield slot
+
+
+def gerar_um(caminho, data_inicio, formato, pasta_saida, streaming=False, intercalar=False):
+    inicio = time.perf_counter()
+    exportador, nome_arquivo, _ = FORMATOS_EXPORT[formato]
+    extensao = os.path.splitext(nome_arquivo)[1]
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    destino = os.path.join(pasta_saida, f"Cronograma_{nome}{extensao}")
+
+    cols = [COL_DISCIPLINA, COL_ASSUNTO, COL_CARGA]
+    if streaming:
+        # Da planilha ao arquivo sem materializar o plano
+        contador = Contador()
+        ordem = (intercalar_disciplinas,) if intercalar else (ordenar_por_disciplina, expandir)
+        slots = pipeline(
+            linhas_edital(caminho, cols), topicos, *ordem,
+            partial(datar, data_inicio=data_inicio), contador,
+        )
+        exportador(slots, {}, destino)
+        return destino, contador.total, time.perf_counter() - inicio
+
+    df = load_data(caminho, cols=cols)
+    indice = IndiceAssuntos(df, *cols)
+    visao = VisaoIntercalada(indice, data_inicio) if intercalar else VisaoCronograma(indice, data_inicio)
+    exportador(visao, {}, destino)
+    return destino, visao.total_itens, time.perf_counter() - inicio
+
+
+def editais(pasta):
+    # Ignora os arquivos temporários "~$..." que o Excel deixa abertos
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.lower().endswith(".xlsx") and not nome.startswith("~$")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera cronogramas para vários editais em paralelo.")
+    parser.add_argument("pasta", help="diretório com os editais verticalizados (.xlsx)")
+    parser.add_argument("--inicio", type=date.fromisoformat, default=date.today(),
+                        help="data de início no formato AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument("--formato", choices=list(FORMATOS_EXPORT), default="Excel")
+    parser.add_argument("--saida", default="cronogramas", help="diretório de saída")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(),
+                        help="tamanho do pool de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="gera pelo pipeline preguiçoso, sem carregar o edital inteiro")
+    parser.add_argument("--intercalar", action="store_true",
+                        help="alterna as disciplinas (round-robin) em vez de uma inteira por vez")
+    args = parser.parse_args(argv)
+
+    arquivos = editais(args.pasta)
+    if not arquivos:
+        print(f"Nenhum .xlsx encontrado em {args.pasta}", file=sys.stderr)
+        return 1
+    os.makedirs(args.saida, exist_ok=True)
+
+    inicio = time.perf_counter()
+    erros = 0
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        tarefas = {
+            pool.submit(
+                gerar_um, caminho, args.inicio, args.formato, args.saida, args.streaming, args.intercalar
+            ): caminho
+            for caminho in arquivos
+        }
+        for tarefa in as_completed(tarefas):
+            caminho = tarefas[tarefa]
+            try:
+                destino, itens, segundos = tarefa.result()
+            except Exception as e:
+                erros += 1
+                print(f"ERRO  {caminho}: {e}")
+            else:
+                print(f"ok    {caminho} -> {destino} ({itens} itens, {segundos:.2f}s)")
+
+    total = time.perf_counter() - inicio
+    print(f"{len(arquivos) - erros}/{len(arquivos)} editais gerados em {total:.2f}s")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import json
+import os
+from datetime import date
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from cronograma_core import (
+    AbaExcel, DatasConclusao, DiarioProgresso, EstatisticasProgresso, GravadorAssincrono,
+    IndiceAssuntos, PerfilProgresso, ProgressoSQLite, Topico, VisaoIntercalada, VisaoOrcamento,
+    VisaoRevisoes, datar, em_lotes, empacotar_dias, expandir, expandir_assuntos, exportar_csv,
+    exportar_ics, gerar_cronograma, gerar_cronograma_compacto, id_item, intercalar_disciplinas,
+    linhas_edital, load_data, mesclar_editais, ordenar_por_disciplina, pipeline, topicos,
+)
+
+COLS = ["Disciplina", "Assunto", "Estudo (h)"]
+EDITAL_PRF = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "Edital_Verticalizado",
+    "EditalVerticalizado-PRF_2024.xlsx",
+)
+
+
+def indice_exemplo():
+    df = pd.DataFrame({
+        "Disciplina": ["Português", "Direito", "Direito"],
+        "Assunto": ["Crase", "Penal", "Civil"],
+        "Estudo (h)": [2, 1.5, 1],
+    })
+    return IndiceAssuntos(df, *COLS)
+
+
+def test_diario_rotacao_compactacao_recarga(tmp_path):
+    caminho = str(tmp_path / "progresso.json")
+    # Limite baixo: o segundo append já rotaciona o diário
+    diario = DiarioProgresso(caminho, limite=40)
+    diario.registrar(1, True)
+    diario.registrar(2, True)
+    diario.aguardar()
+    diario.registrar(1, False)
+    diario.registrar(3, True)
+    diario.aguardar()
+
+    assert not os.path.exists(caminho + ".log.1")
+    assert DiarioProgresso(caminho).carregar() == {2: True, 3: True}
+
+
+def test_diario_compactacao_vem_do_disco(tmp_path):
+    # Duas instâncias no mesmo arquivo, como duas sessões: a compactação de uma
+    # não pode apagar o que a outra gravou
+    caminho = str(tmp_path / "progresso.json")
+    a = DiarioProgresso(caminho, limite=40)
+    b = DiarioProgresso(caminho, limite=10**6)
+    b.registrar(7, True)
+    a.registrar(1, True)
+    a.aguardar()
+
+    assert DiarioProgresso(caminho).carregar() == {1: True, 7: True}
+
+
+def test_gravador_coalescido_mantem_desmarcacao(tmp_path):
+    # tick 1, tick 2, untick 1 no mesmo lote, com rotação do diário no meio
+    caminho = str(tmp_path / "progresso.json")
+    diario = DiarioProgresso(caminho, limite=40)
+    gravador = GravadorAssincrono(diario, intervalo_ms=60_000)
+    gravador.registrar(1, True)
+    gravador.registrar(2, True)
+    gravador.registrar(1, False)
+    gravador.flush()
+    diario.aguardar()
+
+    assert DiarioProgresso(caminho).carregar() == {2: True}
+
+def test_diario_migra_chaves_antigas(tmp_path):
+    caminho = str(tmp_path / "progresso.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"Direito::Crase - Parte 1": True, "Direito::Crase - Parte 2": False}, f)
+    with open(caminho + ".log", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "Física::Óptica - Parte 1", "v": True}) + "\n")
+        f.write('{"id": 12')  # append truncado por um crash
+
+    progresso = DiarioProgresso(caminho).carregar()
+
+    esperado = {id_item("Direito::Crase - Parte 1"): True, id_item("Física::Óptica - Parte 1"): True}
+    assert progresso == esperado
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f) == sorted(esperado)
+    assert not os.path.exists(caminho + ".log")
+    assert DiarioProgresso(caminho).carregar() == esperado
+
+
+def test_sqlite_uma_conexao_varios_perfis(tmp_path):
+    banco = ProgressoSQLite(str(tmp_path / "progresso.db"))
+    ana = PerfilProgresso(banco, "ana", "plano")
+    bia = PerfilProgresso(GravadorAssincrono(banco), "bia", "plano")
+    ana.registrar(1, True)
+    bia.registrar(2, True)
+    bia.registrar(2, False)
+    bia.registrar(3, True)
+
+    assert ana == PerfilProgresso(banco, "ana", "plano")
+    assert ana != PerfilProgresso(banco, "bia", "plano")
+    assert ana.carregar() == {1: True}
+    assert bia.carregar() == {3: True}
+    ana.resetar()
+    assert banco.carregar("ana", "plano") == {}
+    assert banco.carregar("bia", "plano") == {3: True}
+
+
+class _Workbook:
+    # Só o necessário do openpyxl.Workbook(write_only=True)
+    def __init__(self):
+        self.abas = {}
+
+    def create_sheet(self, nome):
+        # Uma lista já tem o append() das abas write-only
+        aba = self.abas[nome] = []
+        return aba
+
+
+def test_aba_excel_continua_no_limite_de_linhas():
+    wb = _Workbook()
+    aba = AbaExcel(wb, "Cronograma", set(), ["id"], max_linhas=3)
+    for i in range(5):
+        aba.append([i])
+
+    assert wb.abas == {
+        "Cronograma": [["id"], [0], [1]],
+        "Cronograma (2)": [["id"], [2], [3]],
+        "Cronograma (3)": [["id"], [4]],
+    }
+
+
+def test_empacotar_pula_dia_em_que_o_item_nao_cabe():
+    # Seg 2h, Ter 0.5h: a Parte de 1h que sobra vai para quarta, não para terça
+    orcamento = (2, 0.5, 2, 2, 2, 0, 0)
+    dias = empacotar_dias(np.array([1, 0.5, 0.5, 1]), orcamento, 0)
+    assert dias.tolist() == [0, 0, 0, 2]
+
+
+def test_empacotar_item_maior_que_qualquer_dia_fica_sozinho():
+    dias = empacotar_dias(np.array([3, 1, 1]), (2, 2, 2, 2, 2, 0, 0), 0)
+    assert dias.tolist() == [0, 1, 1]
+
+
+def test_orcamento_comecando_no_domingo_preenche_a_semana_1():
+    visao = VisaoOrcamento(indice_exemplo(), date(2025, 10, 19), (3, 3, 3, 3, 3, 6, 0))
+    semana = visao.semana(1)
+    assert len(semana) == visao.total_itens
+    assert semana["Data"].min() == pd.Timestamp("2025-10-20")
+    assert visao.total_semanas == 1
+
+
+def test_ics_usa_o_tempo_de_cada_slot():
+    visao = VisaoOrcamento(indice_exemplo(), date(2025, 10, 20))
+    ics = exportar_ics(visao, {}).decode("utf-8")
+    assert "DESCRIPTION:Direito - Estudo - 0.5h Estudo" in ics
+
+
+def test_estatisticas_contam_as_revisoes_espacadas():
+    indice = indice_exemplo()
+    visao = VisaoRevisoes(indice, date(2025, 10, 20), (1, 7, 30))
+    df = pd.DataFrame({
+        "Disciplina": indice.disciplinas, "Assunto": indice.assuntos,
+        "Estudo (h)": indice.n_partes + indice.carga_decimal,
+    })
+    estatisticas = EstatisticasProgresso(gerar_cronograma_compacto(df, *COLS, date(2025, 10, 20)))
+    estatisticas.acrescentar(*visao.revisoes_extras())
+
+    assert estatisticas.total == visao.total_itens
+    plano = visao.fatia(0, visao.total_itens)
+    extra = plano.loc[plano["Assunto"].str.startswith("Revisão 3 (D+30)"), "id"].iloc[0]
+    estatisticas.marcar(int(extra), True)
+    assert estatisticas.feitos == 1
+
+
+def test_conclusoes_gravadas_refazem_o_mesmo_plano(tmp_path):
+    caminho = str(tmp_path / "revisoes.json")
+    indice = indice_exemplo()
+    visao = VisaoRevisoes(indice, date(2025, 10, 20))
+    plano = visao.fatia(0, visao.total_itens)
+    ultima = int(plano.loc[plano["Assunto"] == "Crase - Parte 2", "id"].iloc[0])
+
+    assert visao.concluir(ultima, date(2025, 11, 10))
+    DatasConclusao(caminho).registrar(ultima, date(2025, 11, 10), "ana", "plano")
+
+    recarregada = VisaoRevisoes(indice, date(2025, 10, 20))
+    recarregada.aplicar_conclusoes(DatasConclusao(caminho).carregar("ana", "plano"))
+    assert recarregada.fatia(0, 100).equals(visao.fatia(0, 100))
+    assert DatasConclusao(caminho).carregar("bia", "plano") == {}
+
+
+def expandir_referencia(df, col_disciplina, col_assunto, col_carga):
+    # A expansão original, linha a linha, como referência da versão vetorizada
+    plano = []
+    for disc, group in df.groupby(col_disciplina):
+        for _, row in group.iterrows():
+            assunto = row[col_assunto]
+            carga = row[col_carga]
+            carga_int = int(carga)
+            carga_decimal = carga - carga_int
+            for i in range(carga_int):
+                plano.append((disc, f"{assunto} - Parte {i+1}", "Estudo"))
+            if carga_decimal > 0:
+                plano.append((disc, f"{assunto} - Parte final ({carga_decimal:.1f}h)", "Estudo"))
+            plano.append((disc, f"Revisão {assunto}", "Revisão"))
+    return plano
+
+
+def test_expandir_vetorizado_igual_ao_loop_original():
+    editais = [pd.DataFrame({
+        "Disciplina": ["Física", "Direito", None, "Direito", "Ética"],
+        "Assunto": ["Óptica", "Penal", "Sem disciplina", "Civil", "Conduta"],
+        "Estudo (h)": [2.5, 1, 3, 0.3, 4],
+    })]
+    if os.path.exists(EDITAL_PRF):
+        editais.append(load_data(EDITAL_PRF, cols=COLS))
+    for df in editais:
+        vetorizado = list(expandir_assuntos(df, *COLS).itertuples(index=False, name=None))
+        assert vetorizado == expandir_referencia(df, *COLS)
+
+
+def test_pipeline_igual_ao_gerar_cronograma(tmp_path):
+    # Segunda, domingo e sábado como início
+    if os.path.exists(EDITAL_PRF):
+        caminho = EDITAL_PRF
+    else:
+        caminho = str(tmp_path / "edital.xlsx")
+        pd.DataFrame({
+            "Disciplina": ["Física", "Direito", "Direito"],
+            "Assunto": ["Óptica", "Penal", "Civil"],
+            "Estudo (h)": [2.5, 1, 0.3],
+        }).to_excel(caminho, index=False)
+    df = load_data(caminho, cols=COLS)
+    for inicio in (date(2025, 10, 20), date(2025, 10, 19), date(2025, 10, 25)):
+        esperado = gerar_cronograma(df, *COLS, inicio)
+        slots = pipeline(
+            linhas_edital(caminho, COLS), topicos, ordenar_por_disciplina, expandir,
+            partial(datar, data_inicio=inicio),
+        )
+        obtido = pd.concat(list(em_lotes(slots, 1000)), ignore_index=True)
+        pd.testing.assert_frame_equal(obtido[esperado.columns], esperado, check_dtype=False)
+
+
+def test_mesclar_editais_um_rotulo_por_disciplina():
+    a = pd.DataFrame({"Disciplina": ["Direito Penal"], "Assunto": ["Crimes"], "Estudo (h)": [2]})
+    b = pd.DataFrame({
+        "Disciplina": ["direito  penal", "direito penal", None],
+        "Assunto": ["crimes", "Outro", "Sem disciplina"],
+        "Estudo (h)": [3, 1, 1],
+    })
+    mesclado = mesclar_editais({"A": a, "B": b}, *COLS)
+
+    assert mesclado.to_dict("list") == {
+        "Disciplina": ["Direito Penal", "Direito Penal"],
+        "Assunto": ["Crimes", "Outro"],
+        "Estudo (h)": [3, 1],
+        "Concursos": ["A, B", "B"],
+    }
+    assert list(IndiceAssuntos(mesclado, *COLS).disciplinas) == ["Direito Penal", "Direito Penal"]
+
+
+def test_orcamento_com_horas_no_domingo():
+    df = pd.DataFrame({
+        "Disciplina": [f"Disciplina {i % 4}" for i in range(30)],
+        "Assunto": [f"Assunto {i}" for i in range(30)],
+        "Estudo (h)": [2.5] * 30,
+    })
+    visao = VisaoOrcamento(IndiceAssuntos(df, *COLS), date(2025, 10, 20), (3, 3, 3, 3, 3, 6, 2))
+    semana = visao.semana(1)
+
+    assert semana["Dia da Semana"].iloc[-1] == "Domingo"
+    assert semana["Data"].iloc[-1] == pd.Timestamp("2025-10-26")
+    assert "Domingo" in exportar_csv(visao, {}).decode("utf-8")
+
+
+def test_visao_intercalada_igual_ao_merge_com_heap():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({
+        "Disciplina": rng.choice(["Português", "Direito", "Física", "Ética"], n),
+        "Assunto": [f"Assunto {i}" for i in range(n)],
+        "Estudo (h)": rng.integers(0, 4, n) + rng.integers(0, 10, n) / 10,
+    })
+    pesos = {"Direito": 3, "Física": 0.5, "Português": 1.5}
+
+    visao = VisaoIntercalada(IndiceAssuntos(df, *COLS), date(2025, 10, 20), pesos)
+    plano = visao.fatia(0, visao.total_itens)
+    topicos_df = (Topico(*linha) for linha in df.itertuples(index=False, name=None))
+    esperado = [tuple(item) for item in intercalar_disciplinas(topicos_df, pesos)]
+
+    assert list(plano[["Disciplina", "Assunto", "Tipo"]].itertuples(index=False, name=None)) == esperado